@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+import django
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bookEx.settings')
 
-application = get_asgi_application()
+if os.environ.get('BOOKMNG_ASYNC_VIEWS') == '1':
+    # Serve the async catalog views (bookMng.async_views); off by default
+    # until bench_asgi shows them winning
+    django.setup(set_prefix=False)
+    from bookMng.async_views import AsyncViewsASGIHandler
+
+    application = AsyncViewsASGIHandler()
+else:
+    application = get_asgi_application()
@@ -0,0 +1,11 @@
+"""
+Settings package. DJANGO_ENV=production loads production.py; anything else
+(the default) loads dev.py. Either module can also be named directly in
+DJANGO_SETTINGS_MODULE, e.g. bookEx.settings.production.
+"""
+import os
+
+if os.environ.get('DJANGO_ENV', 'dev') == 'production':
+    from .production import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
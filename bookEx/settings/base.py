@@ -0,0 +1,192 @@
+"""
+Django settings for bookEx project - shared by every environment.
+
+Generated by 'django-admin startproject' using Django 3.2.20. dev.py and
+production.py build on this; bookEx.settings picks one from DJANGO_ENV.
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Overridden per environment (see dev.py / production.py)
+DEBUG = False
+ALLOWED_HOSTS = []
+
+# Application definition
+INSTALLED_APPS = [
+    'bookMng.apps.BookmngConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'bookMng.middleware.RequestTimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'bookEx.urls'
+
+# IMPORTANT: your templates live in bookEx/bookEx/templates/
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'bookEx', 'templates')],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'bookMng.context_processors.main_menu',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'bookEx.wsgi.application'
+
+# Database (SQLite, tuned for concurrent requests - see bookEx/sqlite_backend).
+# production.py replaces this with DATABASE_URL.
+DATABASES = {
+    'default': {
+        'ENGINE': 'bookEx.sqlite_backend',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests instead of reconnecting
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds a writer waits for the lock before "database is locked"
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64000,
+            },
+        },
+    }
+}
+
+# Caches (process-local; point at Redis/Memcached for multi-process deploys)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Sessions. Pick a backend with BOOKMNG_SESSION_BACKEND:
+#   db             - every session write is an SQLite row write (default)
+#   cached_db      - reads from the cache, writes through to the DB
+#   cache          - cache only; fastest, but sessions die with the cache
+#   signed_cookies - no server storage at all; keep session data small
+# The cache-backed engines need a cache shared by every worker process;
+# with the LocMem cache above each worker would read its own stale copy.
+# production.py switches to cached_db when REDIS_URL is set.
+# Compare them with `manage.py bench_sessions`.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('BOOKMNG_SESSION_BACKEND', 'db')]
+
+# Password validation — DISABLED so you can use short/simple passwords
+AUTH_PASSWORD_VALIDATORS = []
+
+# Internationalization
+LANGUAGE_CODE = 'en-us'
+TIME_ZONE = 'UTC'
+USE_I18N = True
+USE_L10N = True
+USE_TZ = True
+
+# Static files
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [
+    os.path.join(BASE_DIR, 'bookEx', 'static'),
+]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic writes content-hashed names (base.<hash>.css) plus a manifest,
+# so static URLs can be cached forever. dev.py serves the sources as-is.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+    },
+}
+
+# Default primary key field type
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Books per catalog/search page (keyset pagination)
+BOOKMNG_PAGE_SIZE = 24
+
+# Comments per page on book_detail; later pages load from comment_page
+BOOKMNG_COMMENTS_PAGE_SIZE = 20
+
+# Full-page cache for anonymous catalog visits (bookMng.page_cache); None
+# disables it. Use a shared cache in production so every worker sees the
+# invalidations.
+BOOKMNG_PAGE_CACHE = 'default'
+BOOKMNG_PAGE_CACHE_TIMEOUT = 300
+
+# book_detail views are counted in memory and written in batches, after this
+# many seconds or this many pending views, whichever comes first
+BOOKMNG_VIEW_FLUSH_INTERVAL = 30
+BOOKMNG_VIEW_FLUSH_THRESHOLD = 500
+
+# Cache alias holding the navigation menu; None keeps it in process memory,
+# where a copy is reloaded after BOOKMNG_MENU_LOCAL_TTL seconds so other
+# workers pick up menu edits. Production uses the shared cache with Redis.
+BOOKMNG_MENU_CACHE = None
+BOOKMNG_MENU_LOCAL_TTL = 60
+
+# Requests slower than this are logged to "bookMng.slow_requests" with their
+# N slowest SQL statements
+BOOKMNG_SLOW_REQUEST_MS = 500
+BOOKMNG_SLOW_REQUEST_SQL = 5
+
+# Listing thumbnails for uploaded pictures, built by a background thread pool
+# (0 workers builds them inline after the upload commits)
+BOOKMNG_THUMBNAIL_SIZE = (400, 400)
+BOOKMNG_THUMBNAIL_WORKERS = 2
+
+# Internal nginx location mapped to MEDIA_ROOT; when set, media responses
+# hand the body off via X-Accel-Redirect instead of streaming it from Python
+BOOKMNG_ACCEL_REDIRECT = None
+
+# Neighbours kept per book for "readers who favorited this also favorited"
+# (see bookMng.recommendations; rebuild with manage.py rebuild_recommendations)
+BOOKMNG_RECOMMENDATIONS_K = 10
+
+# Index page leaderboards (see bookMng.leaderboards): trending activity halves
+# every BOOKMNG_TRENDING_HALF_LIFE_HOURS; top rated is a Bayesian average that
+# counts BOOKMNG_TOP_RATED_PRIOR extra votes at the site-wide mean
+BOOKMNG_LEADERBOARD_SIZE = 5
+BOOKMNG_TRENDING_HALF_LIFE_HOURS = 72
+BOOKMNG_TOP_RATED_PRIOR = 5
+
+# Where to go after login/logout
+LOGIN_REDIRECT_URL = 'index'
+LOGOUT_REDIRECT_URL = 'index'
+# Media (user uploads)
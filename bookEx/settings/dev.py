@@ -0,0 +1,13 @@
+"""Local development: DEBUG on, SQLite, sources served by runserver"""
+from .base import *  # noqa: F401,F403
+from .env import env, env_list
+
+# Quick-start development settings - unsuitable for production
+SECRET_KEY = env(
+    'DJANGO_SECRET_KEY',
+    'django-insecure-1$!lr8=ta)f&%6u6p1k1_8%o5mg*b_49es-$t43sty(96k#q84',
+)
+DEBUG = True
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
+
+STORAGES['staticfiles']['BACKEND'] = 'django.contrib.staticfiles.storage.StaticFilesStorage'
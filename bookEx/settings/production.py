@@ -0,0 +1,68 @@
+"""
+Production: DEBUG off and everything secret or host-specific read from the
+environment.
+
+    DJANGO_ENV=production
+    DJANGO_SECRET_KEY=...
+    DJANGO_ALLOWED_HOSTS=books.example.com
+    DATABASE_URL=postgres://bookex:secret@db:5432/bookex
+
+PostgreSQL lets several worker processes write at once. Each worker keeps
+its connections open for DATABASE_CONN_MAX_AGE seconds (health-checked
+before reuse). Django 4.2 has no built-in connection pool (psycopg's pool
+arrived in 5.1), so pool connections with PgBouncer in transaction mode and
+set DATABASE_PGBOUNCER=1, which also drops server-side cursors since they
+cannot outlive a pooled transaction.
+
+Behind a TLS-terminating proxy that sets X-Forwarded-Proto (and strips it
+from clients), set DJANGO_BEHIND_PROXY=1 so requests count as HTTPS.
+"""
+from .base import *  # noqa: F401,F403
+from .env import env, env_bool, env_int, env_list, parse_database_url
+
+SECRET_KEY = env('DJANGO_SECRET_KEY', required=True)
+DEBUG = False
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
+CSRF_TRUSTED_ORIGINS = env_list('DJANGO_CSRF_TRUSTED_ORIGINS')
+
+# Database: DATABASE_URL, falling back to the tuned SQLite file from base.py
+if env('DATABASE_URL'):
+    DATABASES = {'default': parse_database_url(env('DATABASE_URL'))}
+# Under ASGI each request runs its queries on a fresh thread, so persistent
+# connections pile up; ASGI deployments should set DATABASE_CONN_MAX_AGE=0
+# and rely on PgBouncer instead.
+DATABASES['default']['CONN_MAX_AGE'] = env_int('DATABASE_CONN_MAX_AGE', 600)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+if (DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+        and env_bool('DATABASE_PGBOUNCER')):
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Share cached pages, fragments and sessions between worker processes
+if env('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': env('REDIS_URL'),
+        },
+    }
+    BOOKMNG_MENU_CACHE = 'default'
+    SESSION_ENGINE = SESSION_ENGINES[env('BOOKMNG_SESSION_BACKEND', 'cached_db')]
+else:
+    # A per-process page cache would miss other workers' invalidations
+    BOOKMNG_PAGE_CACHE = None
+
+# Parse each template once per process
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+SESSION_COOKIE_SECURE = env_bool('DJANGO_SECURE_COOKIES', True)
+CSRF_COOKIE_SECURE = SESSION_COOKIE_SECURE
+# Only trust X-Forwarded-Proto when a proxy controls it
+if env_bool('DJANGO_BEHIND_PROXY'):
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
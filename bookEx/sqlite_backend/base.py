@@ -0,0 +1,44 @@
+"""
+SQLite backend tuned for a multi-threaded web server.
+
+Every new connection gets the PRAGMAs in OPTIONS["pragmas"] (WAL journal,
+synchronous=NORMAL, a busy timeout, mmap and page cache sizes), and
+transactions start with BEGIN IMMEDIATE. A deferred transaction that reads
+and then writes cannot wait on the busy handler when another writer got
+there first - SQLite fails it at once with "database is locked" - whereas
+an immediate one takes the write lock up front and simply queues.
+
+Use it with ENGINE = "bookEx.sqlite_backend".
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64000,  # negative = KiB, so 64 MB
+    "temp_store": "MEMORY",
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        options = dict(self.settings_dict["OPTIONS"])
+        self.pragmas = {**DEFAULT_PRAGMAS, **options.pop("pragmas", {})}
+        self.begin_sql = "BEGIN " + options.pop("transaction_mode", "IMMEDIATE")
+        settings_dict = self.settings_dict
+        self.settings_dict = {**settings_dict, "OPTIONS": options}
+        try:
+            return super().get_connection_params()
+        finally:
+            self.settings_dict = settings_dict
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(self.begin_sql)
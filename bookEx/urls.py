@@ -1,24 +1,13 @@
 """bookEx URL Configuration"""
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
 # import the Register view from your app
+from bookMng import media
 from bookMng.views import Register
-from django.contrib import admin
-from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
-
-urlpatterns = [
-    path("admin/", admin.site.urls),
-    path("", include("bookMng.urls")),
-    path("", include("django.contrib.auth.urls")),
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -37,3 +26,15 @@ urlpatterns = [
     # built-in auth views: /login, /logout, /password_change, etc.
     path("", include("django.contrib.auth.urls")),
 ]
+
+# Uploads are always served by the app (ETag/Range/immutable caching, or
+# X-Accel-Redirect when BOOKMNG_ACCEL_REDIRECT is set). With DEBUG on,
+# runserver's staticfiles handler serves /static/ from the app directories;
+# otherwise the collected, hashed files in STATIC_ROOT are served here.
+urlpatterns += [
+    path(settings.MEDIA_URL.lstrip("/") + "<path:path>", media.serve_media, name="media"),
+]
+if not settings.DEBUG:
+    urlpatterns += [
+        path(settings.STATIC_URL.lstrip("/") + "<path:path>", media.serve_static, name="static"),
+    ]
@@ -0,0 +1,19 @@
+"""
+URLconf for AsyncViewsASGIHandler: the async catalog views in front of
+everything in bookEx.urls. Same paths and names, so reverse() and the
+templates don't change.
+"""
+
+from django.urls import path
+
+from bookMng import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("displaybooks", async_views.displaybooks, name="displaybooks"),
+    path("book_detail/<int:book_id>", async_views.book_detail, name="book_detail"),
+    path("search", async_views.search, name="search"),
+    path("comment/list/<int:book_id>", async_views.comment_page, name="comment_page"),
+    path("favorites", async_views.favorites_list, name="favorites_list"),
+] + sync_urlpatterns
@@ -1,8 +1,12 @@
 from django.contrib import admin
-from .models import MainMenu, Book, Comment, Rating, Favorite
+from .models import MainMenu, Book, Comment, Rating, Favorite, Cart, CartItem, BookNeighbor, BookScore
 
 admin.site.register(MainMenu)
 admin.site.register(Book)
 admin.site.register(Comment)
 admin.site.register(Rating)
 admin.site.register(Favorite)
+admin.site.register(Cart)
+admin.site.register(CartItem)
+admin.site.register(BookNeighbor)
+admin.site.register(BookScore)
@@ -0,0 +1,351 @@
+"""
+JSON API over the catalog.
+
+Reads are built from .values() rows rather than model instances, and
+``?fields=id,name,price`` trims both the SELECT list and the payload. Every
+GET carries a strong ETag (a digest of the body) and answers If-None-Match
+with 304, so clients and CDNs revalidate without re-downloading. A single
+book also carries Last-Modified (and honours If-Modified-Since). Collections
+don't: removing a row changes the page without making anything on it newer.
+
+Mutations need a signed-in session (and its CSRF token) and answer 401
+otherwise. The batch endpoints apply many books' worth of ratings,
+favorites or cart quantities in one request (see bookMng.batch).
+"""
+import hashlib
+import json
+from decimal import Decimal
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_http_methods, require_safe
+
+from . import batch, cart
+from .models import Book, Comment, Favorite, Rating
+from .pagination import get_page_size, keyset_paginate
+from .search_index import search_books
+from .storage import picture_storage
+
+# Public field name -> column of Book.objects.with_listing_data()
+BOOK_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "web": "web",
+    "price": "price",
+    "publishdate": "publishdate",
+    "owner": "username__username",
+    "picture": "picture",
+    "thumbnail": "thumbnail",
+    "thumbnail_webp": "thumbnail_webp",
+    "rating_count": "rating_count",
+    "avg_rating": "avg_rating",
+    "comment_count": "comment_count",
+    "favorite_count": "favorite_count",
+    "version": "version",
+    "updated_at": "updated_at",
+}
+# Always fetched: keyset cursors and the detail Last-Modified need them
+KEY_COLUMNS = ("id", "name", "updated_at")
+
+COMMENT_FIELDS = {
+    "id": "id",
+    "user": "user__username",
+    "text": "text",
+    "created_at": "created_at",
+}
+COMMENT_ORDER = ("-id",)  # Comment.Meta.ordering
+
+# Most books one batch request may touch
+MAX_BATCH = 500
+CENTS = Decimal("0.01")
+
+
+class FieldError(ValueError):
+    pass
+
+
+def error(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error("Authentication required", 401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def selected_fields(request, available):
+    """Public field names asked for with ?fields=, in order"""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(available)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise FieldError("Unknown field(s): " + ", ".join(unknown))
+    return fields
+
+
+def book_columns(fields):
+    return list(dict.fromkeys([*KEY_COLUMNS, *(BOOK_FIELDS[f] for f in fields)]))
+
+
+def shape(row, fields, mapping):
+    """Rename a .values() row to public field names, turning files into URLs"""
+    item = {}
+    for field in fields:
+        value = row[mapping[field]]
+        if field == "picture" and value:
+            value = picture_storage().url(value)
+        elif field in ("thumbnail", "thumbnail_webp") and value:
+            value = default_storage.url(value)
+        item[field] = value
+    return item
+
+
+def conditional_json(request, payload, last_modified=None, status=200):
+    """JsonResponse-alike with an ETag, answering 304 when the client is current"""
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":"))
+    etag = quote_etag(hashlib.sha256(body.encode()).hexdigest()[:32])
+    response = HttpResponse(body, status=status, content_type="application/json")
+    response["ETag"] = etag
+    # Cacheable, but revalidated on every use
+    response["Cache-Control"] = "public, no-cache"
+    timestamp = None
+    if last_modified is not None:
+        timestamp = int(last_modified.timestamp())
+        response["Last-Modified"] = http_date(timestamp)
+    return get_conditional_response(
+        request, etag=etag, last_modified=timestamp, response=response
+    )
+
+
+def page_payload(page, fields, mapping):
+    return {
+        "results": [shape(row, fields, mapping) for row in page],
+        "next": page.next_cursor or None,
+        "prev": page.prev_cursor or None,
+    }
+
+
+def read_body(request):
+    """Form or JSON request body as a dict"""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+# ========= Books =========
+
+@require_safe
+def book_list(request):
+    try:
+        fields = selected_fields(request, BOOK_FIELDS)
+    except FieldError as exc:
+        return error(str(exc), 400)
+    page = keyset_paginate(
+        Book.objects.with_listing_data().values(*book_columns(fields)),
+        request.GET.get("cursor"),
+        get_page_size(request),
+    )
+    return conditional_json(request, page_payload(page, fields, BOOK_FIELDS))
+
+
+@require_safe
+def book_search(request):
+    q = request.GET.get("q", "").strip()
+    if not q:
+        return error("Missing q", 400)
+    try:
+        fields = selected_fields(request, BOOK_FIELDS)
+    except FieldError as exc:
+        return error(str(exc), 400)
+    page = search_books(
+        q, request.GET.get("cursor"), get_page_size(request),
+        columns=book_columns(fields),
+    )
+    return conditional_json(request, page_payload(page, fields, BOOK_FIELDS))
+
+
+@require_safe
+def book_detail(request, book_id):
+    try:
+        fields = selected_fields(request, BOOK_FIELDS)
+    except FieldError as exc:
+        return error(str(exc), 400)
+    row = (
+        Book.objects.with_listing_data()
+        .filter(id=book_id).values(*book_columns(fields)).first()
+    )
+    if row is None:
+        return error("Book not found", 404)
+    return conditional_json(request, shape(row, fields, BOOK_FIELDS), row["updated_at"])
+
+
+@require_safe
+def book_comments(request, book_id):
+    try:
+        fields = selected_fields(request, COMMENT_FIELDS)
+    except FieldError as exc:
+        return error(str(exc), 400)
+    if not Book.objects.filter(id=book_id).exists():
+        return error("Book not found", 404)
+    columns = list(dict.fromkeys(["id", *(COMMENT_FIELDS[f] for f in fields)]))
+    page = keyset_paginate(
+        Comment.objects.filter(book_id=book_id).values(*columns),
+        request.GET.get("cursor"),
+        get_page_size(request),
+        fields=COMMENT_ORDER,
+    )
+    return conditional_json(request, page_payload(page, fields, COMMENT_FIELDS))
+
+
+# ========= Ratings and favorites =========
+
+def book_summary(book_id, **extra):
+    row = (
+        Book.objects.filter(id=book_id)
+        .values("id", "rating_count", "rating_sum", "version").first()
+    )
+    count, total = row.pop("rating_count"), row.pop("rating_sum")
+    return {
+        **row,
+        "rating_count": count,
+        "avg_rating": total / count if count else 0.0,
+        **extra,
+    }
+
+
+@require_http_methods(["POST", "DELETE"])
+@api_login_required
+def book_rating(request, book_id):
+    if not Book.objects.filter(id=book_id).exists():
+        return error("Book not found", 404)
+    if request.method == "DELETE":
+        rating = Rating.objects.filter(book_id=book_id, user=request.user).first()
+        if rating is not None:
+            rating.delete()  # one-by-one so the signals adjust the aggregates
+        return JsonResponse(book_summary(book_id, stars=None))
+
+    data = read_body(request)
+    try:
+        stars = int(data.get("stars", 0)) if data is not None else 0
+    except (TypeError, ValueError):
+        stars = 0
+    if not 1 <= stars <= 5:
+        return error("stars must be an integer from 1 to 5", 400)
+    _, created = Rating.objects.update_or_create(
+        book_id=book_id, user=request.user, defaults={"stars": stars}
+    )
+    return JsonResponse(book_summary(book_id, stars=stars), status=201 if created else 200)
+
+
+@require_http_methods(["POST", "DELETE"])
+@api_login_required
+def book_favorite(request, book_id):
+    if not Book.objects.filter(id=book_id).exists():
+        return error("Book not found", 404)
+    if request.method == "DELETE":
+        # Delete through the instance so the book's version is bumped
+        favorite = Favorite.objects.filter(book_id=book_id, user=request.user).first()
+        if favorite is not None:
+            favorite.delete()
+        return JsonResponse({"id": book_id, "favorited": False})
+    _, created = Favorite.objects.get_or_create(book_id=book_id, user=request.user)
+    return JsonResponse({"id": book_id, "favorited": True}, status=201 if created else 200)
+
+
+# ========= Batch =========
+
+def id_map(value):
+    """{"12": 3, ...} from a request body -> {12: 3}; ValueError if malformed"""
+    if not isinstance(value, dict):
+        raise ValueError
+    return {int(k): int(v or 0) for k, v in value.items()}
+
+
+def id_list(value):
+    if not isinstance(value, list):
+        raise ValueError
+    return [int(v) for v in value]
+
+
+def batch_result(requested, updated, **extra):
+    return JsonResponse({
+        "updated": sorted(updated),
+        "missing": sorted(set(requested) - set(updated)),
+        **extra,
+    })
+
+
+@require_http_methods(["POST"])
+@api_login_required
+def batch_ratings(request):
+    """{"ratings": {"<book id>": stars, ...}}; 0 or null removes a rating"""
+    data = read_body(request)
+    try:
+        stars_by_book = id_map(data.get("ratings") if data else None)
+    except (TypeError, ValueError):
+        return error('Expected JSON {"ratings": {"<book id>": stars}}', 400)
+    if len(stars_by_book) > MAX_BATCH:
+        return error(f"At most {MAX_BATCH} books per request", 400)
+    if any(not 0 <= stars <= 5 for stars in stars_by_book.values()):
+        return error("stars must be an integer from 0 to 5", 400)
+
+    updated = batch.rate_books(request.user, stars_by_book)
+    books = [
+        {
+            "id": row["id"],
+            "rating_count": row["rating_count"],
+            "avg_rating": row["rating_sum"] / row["rating_count"] if row["rating_count"] else 0.0,
+        }
+        for row in Book.objects.filter(id__in=updated)
+        .order_by("id").values("id", "rating_count", "rating_sum")
+    ]
+    return batch_result(stars_by_book, updated, books=books)
+
+
+@require_http_methods(["POST"])
+@api_login_required
+def batch_favorites(request):
+    """{"add": [<book id>, ...], "remove": [<book id>, ...]}"""
+    data = read_body(request)
+    try:
+        add = id_list(data.get("add", [])) if data is not None else None
+        remove = id_list(data.get("remove", [])) if data is not None else None
+    except (TypeError, ValueError):
+        add = remove = None
+    if add is None:
+        return error('Expected JSON {"add": [...], "remove": [...]}', 400)
+    if len(add) + len(remove) > MAX_BATCH:
+        return error(f"At most {MAX_BATCH} books per request", 400)
+
+    updated = batch.set_favorites(request.user, add, remove)
+    return batch_result([*add, *remove], updated)
+
+
+@require_http_methods(["POST"])
+def batch_cart(request):
+    """{"items": {"<book id>": quantity, ...}}; quantity 0 removes the line"""
+    data = read_body(request)
+    try:
+        quantities = id_map(data.get("items") if data else None)
+    except (TypeError, ValueError):
+        return error('Expected JSON {"items": {"<book id>": quantity}}', 400)
+    if len(quantities) > MAX_BATCH:
+        return error(f"At most {MAX_BATCH} books per request", 400)
+
+    updated = cart.set_quantities(request, quantities)
+    _, total = cart.cart_contents(request)
+    return batch_result(quantities, updated, total=str(total.quantize(CENTS)))
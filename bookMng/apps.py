@@ -1,6 +1,9 @@
-from django.apps import AppConfig
-
-
-class BookmngConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'bookMng'
+from django.apps import AppConfig
+
+
+class BookmngConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'bookMng'
+
+    def ready(self):
+        from . import signals  # noqa: F401
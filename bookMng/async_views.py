@@ -0,0 +1,173 @@
+"""
+Async variants of the read-heavy catalog views, for ASGI deployments only.
+
+displaybooks, search, book_detail, comment_page and favorites_list here
+render the same templates from the same queries as their bookMng.views
+counterparts, through the async ORM. They are routed by bookEx.urls_async,
+which only AsyncViewsASGIHandler uses; bookEx.asgi serves it when
+BOOKMNG_ASYNC_VIEWS=1. Under WSGI each of them would pay an async_to_sync
+round trip, so the WSGI entry point keeps the sync views.
+
+On Django 4.2 every async ORM call is still a sync_to_async hop, so the
+queries book_detail gathers run one after another on the request's thread.
+Check `manage.py bench_asgi --async-views` against the sync views before
+turning them on.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIHandler
+from django.http import Http404
+from django.shortcuts import render
+
+from . import page_cache, recommendations, view_counts
+from .api import COMMENT_ORDER
+from .models import Book, Comment, Favorite, Rating
+from .pagination import akeyset_paginate, get_page_size
+from .search_index import asearch_books
+
+URLCONF = "bookEx.urls_async"
+
+# Templates and context processors touch the ORM synchronously
+arender = sync_to_async(render)
+
+
+class AsyncViewsASGIHandler(ASGIHandler):
+    """ASGIHandler that resolves requests against bookEx.urls_async"""
+
+    async def get_response_async(self, request):
+        request.urlconf = URLCONF
+        return await super().get_response_async(request)
+
+
+def _load_user(request):
+    request.user.is_authenticated  # resolve the lazy session/user lookup
+    return request.user
+
+
+async def _auser(request):
+    """request.user, loaded off the event loop"""
+    return await sync_to_async(_load_user)(request)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _avalue(value):
+    return value
+
+
+@page_cache.cache_anonymous_page
+async def displaybooks(request):
+    books = await akeyset_paginate(
+        Book.objects.with_listing_data(),
+        request.GET.get("cursor"),
+        get_page_size(request),
+    )
+    page_cache.add_tags(
+        request, page_cache.CATALOG, *(page_cache.book_tag(b.id) for b in books)
+    )
+    return await arender(
+        request, "bookMng/displaybooks.html",
+        {
+            "books": books,
+            "page_size_param": request.GET.get("page_size", ""),
+        }
+    )
+
+
+# Outside the page cache, so cached hits still count
+@view_counts.count_views
+@page_cache.cache_anonymous_page
+async def book_detail(request, book_id):
+    book = await Book.objects.select_related("username").filter(id=book_id).afirst()
+    if book is None:
+        raise Http404("No Book matches the given query.")
+    user = await _auser(request)
+
+    # The first page of comments, the user's rating, the favorite flag and
+    # the similar books are independent, so they are awaited together
+    comments, similar, user_rating, is_favorited = await asyncio.gather(
+        _comment_page(book_id, None),
+        _alist(recommendations.neighbors_of(book_id)),
+        Rating.objects.filter(book_id=book_id, user=user).afirst()
+        if user.is_authenticated else _avalue(None),
+        Favorite.objects.filter(book_id=book_id, user=user).aexists()
+        if user.is_authenticated else _avalue(False),
+    )
+    page_cache.add_tags(
+        request, page_cache.book_tag(book_id), page_cache.RECOMMENDATIONS,
+        *(page_cache.book_tag(row.neighbor_id) for row in similar),
+    )
+
+    return await arender(
+        request, "bookMng/book_detail.html",
+        {
+            "book": book,
+            "comments": comments,
+            "similar": similar,
+            "user_rating": user_rating,
+            "is_favorited": is_favorited,
+        }
+    )
+
+
+def _comment_page(book_id, cursor):
+    return akeyset_paginate(
+        Comment.objects.filter(book_id=book_id).select_related("user"),
+        cursor,
+        getattr(settings, "BOOKMNG_COMMENTS_PAGE_SIZE", 20),
+        fields=COMMENT_ORDER,
+    )
+
+
+async def comment_page(request, book_id):
+    """The next page of a book's comments, as HTML for book_detail to append"""
+    comments = await _comment_page(book_id, request.GET.get("cursor"))
+    return await arender(
+        request, "bookMng/_comments.html",
+        {"comments": comments, "book_id": book_id}
+    )
+
+
+@page_cache.cache_anonymous_page
+async def search(request):
+    q = request.GET.get("q", "").strip()
+    results = []
+    if q:
+        results = await asearch_books(
+            q, request.GET.get("cursor"), get_page_size(request)
+        )
+    page_cache.add_tags(
+        request, page_cache.CATALOG, *(page_cache.book_tag(b.id) for b in results)
+    )
+
+    return await arender(
+        request, "bookMng/search.html",
+        {
+            "q": q,
+            "results": results,
+            "page_size_param": request.GET.get("page_size", ""),
+        }
+    )
+
+
+async def favorites_list(request):
+    """Show user's favorite books"""
+    # login_required only wraps sync views on this Django version
+    user = await _auser(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    books = await _alist(
+        Book.objects.with_listing_data()
+        .filter(favorite__user=user)
+        .order_by('-favorite__added_at')
+    )
+    recommended = await _alist(recommendations.for_user(user)) if books else []
+    return await arender(
+        request, "bookMng/favorites.html",
+        {"books": books, "recommended": recommended}
+    )
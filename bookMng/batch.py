@@ -0,0 +1,88 @@
+"""
+Set-based writes for many books at once, behind the /api/batch endpoints.
+
+Each function runs in one transaction. It uses a fixed number of statements
+however many books are involved: bulk_create with ON CONFLICT for
+upserts, a single DELETE ... IN for removals, and one UPDATE to refresh the
+affected books' counters and cache versions. Bulk writes skip the model
+signals, so that last UPDATE does their job and the recommendation,
+leaderboard and page cache updates are scheduled here.
+"""
+from django.db import connections, router, transaction
+
+from . import leaderboards, page_cache, recommendations
+from .models import Book, Favorite, Rating
+
+
+def delete_rows(model, user, book_ids):
+    """
+    One DELETE ... WHERE user = ... AND book IN (...) on ``model``. Unlike
+    QuerySet.delete() it neither loads the rows nor sends per-row signals;
+    callers fix up the counters. Returns the number of rows deleted.
+    """
+    meta = model._meta
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(book_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(meta.db_table)} "
+            f"WHERE {quote(meta.get_field('user').column)} = %s "
+            f"AND {quote(meta.get_field('book').column)} IN ({placeholders})",
+            [user.pk, *book_ids],
+        )
+        return cursor.rowcount
+
+
+def existing_ids(book_ids):
+    return set(Book.objects.filter(id__in=book_ids).values_list("id", flat=True))
+
+
+@transaction.atomic
+def rate_books(user, stars_by_book):
+    """
+    Apply {book_id: stars} for ``user``; stars of None or 0 removes the
+    rating. Returns the ids of the books that were changed.
+    """
+    book_ids = existing_ids(stars_by_book)
+    upserts = [
+        Rating(book_id=book_id, user=user, stars=stars)
+        for book_id, stars in stars_by_book.items()
+        if book_id in book_ids and stars
+    ]
+    removals = [book_id for book_id, stars in stars_by_book.items()
+                if book_id in book_ids and not stars]
+    if upserts:
+        Rating.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=["book", "user"],
+            update_fields=["stars"],
+        )
+    if removals:
+        delete_rows(Rating, user, removals)
+    Book.objects.filter(id__in=book_ids).refresh_rating_stats()
+    recommendations.schedule_refresh(book_ids)
+    leaderboards.schedule_refresh(book_ids)
+    page_cache.invalidate_books(book_ids)
+    return book_ids
+
+
+@transaction.atomic
+def set_favorites(user, add=(), remove=()):
+    """Favorite the books in ``add`` and unfavorite those in ``remove``"""
+    book_ids = existing_ids([*add, *remove])
+    add = [book_id for book_id in add if book_id in book_ids]
+    remove = [book_id for book_id in remove if book_id in book_ids and book_id not in add]
+    if add:
+        Favorite.objects.bulk_create(
+            [Favorite(user=user, book_id=book_id) for book_id in add],
+            ignore_conflicts=True,
+        )
+    if remove:
+        delete_rows(Favorite, user, remove)
+    Book.objects.filter(id__in=book_ids).bump_version()
+    recommendations.schedule_refresh(book_ids)
+    leaderboards.schedule_refresh(book_ids)
+    page_cache.invalidate_books(book_ids)
+    return book_ids
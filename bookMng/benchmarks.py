@@ -0,0 +1,424 @@
+"""
+Helpers for measuring the catalog: a deterministic synthetic data seeder,
+the query plans of the hot lookup paths, a latency/query-count benchmark
+that drives every URL in bookMng/urls.py through the test client, and a
+concurrent-load comparison of the ASGI and WSGI handlers.
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .async_views import AsyncViewsASGIHandler
+from .instrumentation import percentile
+from .models import Book, Comment, Favorite, Rating
+
+WORDS = (
+    "river shadow garden empire silent winter glass iron city ocean "
+    "secret last northern broken golden hidden paper stone machine song"
+).split()
+
+
+def seed_dataset(books=1000, users=50, ratings=5, comments=3, favorites=5,
+                 seed=0, batch_size=1000):
+    """
+    Bulk-insert a synthetic catalog. ``ratings``, ``comments`` and
+    ``favorites`` are per-book (ratings/favorites are capped by ``users``).
+    The same arguments always produce the same rows.
+    """
+    rng = random.Random(seed)
+    start = Book.objects.count()
+
+    # Continue after the highest existing seedN; counting users would reuse
+    # a name once any user has been deleted
+    existing = User.objects.filter(username__regex=r"^seed[0-9]+$").values_list(
+        "username", flat=True
+    )
+    first_user = max((int(name[4:]) for name in existing), default=-1) + 1
+    names = [f"seed{first_user + i}" for i in range(users)]
+    User.objects.bulk_create([User(username=name) for name in names], batch_size=batch_size)
+    user_ids = list(
+        User.objects.filter(username__in=names).order_by("-id").values_list("id", flat=True)
+    )
+
+    Book.objects.bulk_create(
+        [
+            Book(
+                name=" ".join(rng.sample(WORDS, 3)).title() + f" {start + i}",
+                web=f"https://books.example/{start + i}",
+                price=Decimal(rng.randint(100, 9999)) / 100,
+                username_id=rng.choice(user_ids),
+            )
+            for i in range(books)
+        ],
+        batch_size=batch_size,
+    )
+    book_ids = list(Book.objects.order_by("-id").values_list("id", flat=True)[:books])
+
+    rating_rows, comment_rows, favorite_rows = [], [], []
+    for book_id in book_ids:
+        for user_id in rng.sample(user_ids, min(ratings, len(user_ids))):
+            rating_rows.append(
+                Rating(book_id=book_id, user_id=user_id, stars=rng.randint(1, 5))
+            )
+        for _ in range(comments):
+            comment_rows.append(Comment(
+                book_id=book_id, user_id=rng.choice(user_ids),
+                text=" ".join(rng.choices(WORDS, k=8)),
+            ))
+        for user_id in rng.sample(user_ids, min(favorites, len(user_ids))):
+            favorite_rows.append(Favorite(book_id=book_id, user_id=user_id))
+    Rating.objects.bulk_create(rating_rows, batch_size=batch_size)
+    Comment.objects.bulk_create(comment_rows, batch_size=batch_size)
+    Favorite.objects.bulk_create(favorite_rows, batch_size=batch_size)
+
+    # bulk_create skips the signals that maintain these
+    call_command("backfill_rating_stats", stdout=StringIO())
+    Book.objects.refresh_comment_counts()
+    if connection.vendor == "sqlite":
+        call_command("rebuild_search_index", stdout=StringIO())
+
+    return {
+        "users": users, "books": books, "ratings": len(rating_rows),
+        "comments": len(comment_rows), "favorites": len(favorite_rows),
+    }
+
+
+def foreign_key_index(model, field_name):
+    """Name of the index Django creates for a ForeignKey (db_index=True)"""
+    column = model._meta.get_field(field_name).column
+    editor = connection.schema_editor()
+    return editor._create_index_name(model._meta.db_table, [column], suffix="")
+
+
+def hot_queries():
+    """(label, queryset, index the plan is expected to use) per hot path"""
+    book = Book.objects.order_by("id").first()
+    book_id = book.id if book else 0
+    user_id = book.username_id if book and book.username_id else 0
+    return [
+        ("displaybooks page",
+         Book.objects.order_by("name", "id")[:25],
+         "book_name_id_idx"),
+        ("mybooks",
+         Book.objects.filter(username_id=user_id).order_by("name", "id"),
+         "book_owner_name_idx"),
+        ("book_detail comments",
+         Comment.objects.filter(book_id=book_id).order_by("-id")[:25],
+         foreign_key_index(Comment, "book")),
+        ("favorites_list",
+         Favorite.objects.filter(user_id=user_id)[:25],
+         "favorite_user_recent_idx"),
+    ]
+
+
+def explain_hot_queries():
+    """Return (label, expected index, plan text, uses_index) per hot path"""
+    results = []
+    for label, queryset, index in hot_queries():
+        plan = queryset.explain()
+        results.append((label, index, plan, index in plan))
+    return results
+
+
+def view_cases(user, book):
+    """
+    (url name, method, kwargs factory, POST data) for every bookMng URL;
+    string POST data is sent as a JSON body.
+    The factory runs outside the timed region, so destructive views such as
+    book_delete get a fresh throwaway row each iteration.
+    """
+    def throwaway_book():
+        return {"book_id": Book.objects.create(name="bench", price=1, username=user).id}
+
+    def throwaway_comment():
+        comment = Comment.objects.create(book=book, user=user, text="bench")
+        return {"comment_id": comment.id}
+
+    def this_book():
+        return {"book_id": book.id}
+
+    def no_args():
+        return {}
+
+    return [
+        ("index", "get", no_args, None),
+        ("postbook", "get", no_args, None),
+        ("displaybooks", "get", no_args, None),
+        ("book_detail", "get", this_book, None),
+        ("mybooks", "get", no_args, None),
+        ("book_delete", "get", throwaway_book, None),
+        ("aboutus", "get", no_args, None),
+        ("search", "get", no_args, {"q": book.name.split()[0]}),
+        ("cart", "get", no_args, None),
+        ("cart_add", "get", this_book, None),
+        ("cart_remove", "get", this_book, None),
+        ("cart_clear", "get", no_args, None),
+        ("add_comment", "post", this_book, {"comment_text": "bench"}),
+        ("delete_comment", "post", throwaway_comment, None),
+        ("comment_page", "get", this_book, None),
+        ("rate_book", "post", this_book, {"stars": 4}),
+        ("favorite_toggle", "post", this_book, None),
+        ("favorites_list", "get", no_args, None),
+        ("request_stats", "get", no_args, None),
+        ("api_book_list", "get", no_args, None),
+        ("api_book_search", "get", no_args, {"q": book.name.split()[0]}),
+        ("api_book_detail", "get", this_book, None),
+        ("api_book_comments", "get", this_book, None),
+        ("api_book_rating", "post", this_book, {"stars": 4}),
+        ("api_book_favorite", "post", this_book, None),
+        ("api_batch_ratings", "post", no_args, json.dumps({"ratings": {book.id: 3}})),
+        ("api_batch_favorites", "post", no_args, json.dumps({"add": [book.id]})),
+        ("api_batch_cart", "post", no_args, json.dumps({"items": {book.id: 2}})),
+    ]
+
+
+# Background jobs run inline, so their work is measured with the callbacks
+@override_settings(BOOKMNG_THUMBNAIL_WORKERS=0)
+def bench_views(iterations=20, only=None):
+    """
+    Request every view ``iterations`` times as a logged-in user and return
+    one dict per view with p50/p95 latency (ms) and queries per request.
+
+    Callers should run this inside a transaction they roll back, so nothing
+    ever commits: the on_commit callbacks each request queues (search index,
+    recommendation and leaderboard refreshes, ...) are run right after it
+    instead, with background jobs inline, and reported as commit_p95_ms and
+    commit_queries.
+    """
+    user = User.objects.create_user("bench-user", password="bench")
+    book = Book.objects.order_by("id").first() or Book.objects.create(
+        name="Bench Book", price=1, username=user
+    )
+    client = Client()
+    client.force_login(user)
+
+    results = []
+    for name, method, make_kwargs, data in view_cases(user, book):
+        if only and name not in only:
+            continue
+        timings, queries, status = [], [], None
+        commit_timings, commit_queries = [], []
+        for _ in range(iterations):
+            url = reverse(name, kwargs=make_kwargs())
+            send = getattr(client, method)
+            with CaptureQueriesContext(connection) as ctx:
+                # Leaving this block runs the callbacks the request queued
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    start = time.perf_counter()
+                    if isinstance(data, str):  # JSON body
+                        response = send(url, data, content_type="application/json")
+                    else:
+                        response = send(url, data or {})
+                    committed = time.perf_counter()
+                    request_queries = len(ctx.captured_queries)
+                done = time.perf_counter()
+            timings.append((committed - start) * 1000)
+            commit_timings.append((done - committed) * 1000)
+            queries.append(request_queries)
+            commit_queries.append(len(ctx.captured_queries) - request_queries)
+            status = response.status_code
+        results.append({
+            "view": name,
+            "status": status,
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95),
+            "queries": max(queries),
+            "commit_p95_ms": percentile(commit_timings, 95),
+            "commit_queries": max(commit_queries),
+        })
+    return results
+
+
+def bench_session_backends(engines, iterations=200):
+    """
+    Time an anonymous shopper doing cart_add followed by cart_view under each
+    session engine. Returns one dict per engine with requests/second, p95
+    latency and how many django_session writes each request caused.
+    """
+    book = Book.objects.order_by("id").first() or Book.objects.create(
+        name="Bench Book", price=1
+    )
+    add_url = reverse("cart_add", kwargs={"book_id": book.id})
+    view_url = reverse("cart")
+
+    results = []
+    for name, engine in engines.items():
+        with override_settings(SESSION_ENGINE=engine):
+            client = Client()
+            timings, session_writes = [], 0
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for url in (add_url, view_url):
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        client.get(url)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    session_writes += sum(
+                        1 for q in ctx.captured_queries
+                        if "django_session" in q["sql"]
+                        and not q["sql"].lstrip().upper().startswith("SELECT")
+                    )
+            elapsed = time.perf_counter() - started
+        results.append({
+            "backend": name,
+            "requests_per_s": len(timings) / elapsed,
+            "p95_ms": percentile(timings, 95),
+            "session_writes_per_request": session_writes / len(timings),
+        })
+    return results
+
+
+def catalog_paths():
+    """GET paths of the catalog views, for an existing catalog"""
+    book = Book.objects.order_by("id").first()
+    if book is None:
+        return []
+    return [
+        reverse("displaybooks"),
+        reverse("search") + "?q=" + book.name.split()[0],
+        reverse("book_detail", kwargs={"book_id": book.id}),
+    ]
+
+
+async def _asgi_get(app, url):
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "root_path": "",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    request_sent = False
+    status = None
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def _wsgi_get(app, url):
+    path, _, query = url.partition("?")
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+        "SCRIPT_NAME": "", "SERVER_NAME": "localhost", "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1", "HTTP_HOST": "localhost",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.version": (1, 0), "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True, "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    response = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def _run_asgi(urls, concurrency, handler=ASGIHandler):
+    app = handler()
+    gate = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def one(url):
+        async with gate:
+            start = time.perf_counter()
+            status = await _asgi_get(app, url)
+            timings.append((time.perf_counter() - start) * 1000)
+            return status
+
+    return await asyncio.gather(*(one(url) for url in urls)), timings
+
+
+def _run_wsgi(urls, threads):
+    app = WSGIHandler()
+    timings = []
+
+    def one(url):
+        start = time.perf_counter()
+        status = _wsgi_get(app, url)
+        timings.append((time.perf_counter() - start) * 1000)
+        return status
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(one, urls)), timings
+
+
+def bench_asgi_wsgi(paths, requests=400, concurrency=32, wsgi_threads=8,
+                    db_latency_ms=0, async_views=False):
+    """
+    Fire ``requests`` GETs (cycling through ``paths``) at an in-process
+    ASGIHandler with up to ``concurrency`` in flight, then at a WSGIHandler
+    behind a ``wsgi_threads``-thread pool, the way a threaded WSGI server
+    runs it. With ``async_views`` the ASGI side is also run through
+    AsyncViewsASGIHandler (bookMng.async_views) as "asgi-async". ``db_latency_ms`` adds a sleep to every query to stand in for a
+    database on the network. Rows must be committed: requests run on other
+    threads with their own connections.
+    """
+    urls = [paths[i % len(paths)] for i in range(requests)]
+
+    def add_latency(execute, sql, params, many, context):
+        time.sleep(db_latency_ms / 1000)
+        return execute(sql, params, many, context)
+
+    def on_connect(sender, connection, **kwargs):
+        # Outermost, so execute_wrapper() blocks that are open while the
+        # connection is created still pop their own wrapper on exit
+        connection.execute_wrappers.insert(0, add_latency)
+
+    if db_latency_ms:
+        connection_created.connect(on_connect)
+    servers = [
+        ("asgi", lambda: asyncio.run(_run_asgi(urls, concurrency))),
+        ("wsgi", lambda: _run_wsgi(urls, wsgi_threads)),
+    ]
+    if async_views:
+        servers.insert(1, ("asgi-async", lambda: asyncio.run(
+            _run_asgi(urls, concurrency, AsyncViewsASGIHandler)
+        )))
+    results = []
+    try:
+        for server, run in servers:
+            started = time.perf_counter()
+            statuses, timings = run()
+            elapsed = time.perf_counter() - started
+            results.append({
+                "server": server,
+                "requests_per_s": len(urls) / elapsed,
+                "p50_ms": percentile(timings, 50),
+                "p95_ms": percentile(timings, 95),
+                "errors": sum(1 for status in statuses if status >= 400),
+            })
+    finally:
+        connection_created.disconnect(on_connect)
+    return results
@@ -0,0 +1,147 @@
+"""
+Shopping cart storage.
+
+Signed-in users get a Cart row whose items are changed with single-statement
+F() updates and priced in SQL. Anonymous visitors keep the old session dict
+({"book_id": quantity}), which is only written when it actually changes and
+is folded into the user's Cart when they log in.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from .models import Book, Cart, CartItem
+
+SESSION_KEY = "cart"
+
+LINE_TOTAL = ExpressionWrapper(
+    F("quantity") * F("book__price"),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+def _user_cart(user):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    return cart
+
+
+def add_to_cart(cart, book_id, quantity=1):
+    """Atomically add ``quantity`` of a book, creating the line if needed"""
+    items = CartItem.objects.filter(cart=cart, book_id=book_id)
+    if items.update(quantity=F("quantity") + quantity):
+        return
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(cart=cart, book_id=book_id, quantity=quantity)
+    except IntegrityError:
+        # Lost a race with a concurrent add of the same book
+        items.update(quantity=F("quantity") + quantity)
+
+
+def cart_contents(request):
+    """Return (rows, total) where rows are {"book", "qty", "line"} dicts"""
+    if request.user.is_authenticated:
+        items = (
+            CartItem.objects.filter(cart__user=request.user)
+            .select_related("book")
+            .annotate(line=LINE_TOTAL)
+        )
+        rows = [{"book": i.book, "qty": i.quantity, "line": i.line} for i in items]
+        total = (
+            CartItem.objects.filter(cart__user=request.user)
+            .aggregate(total=Sum(LINE_TOTAL))["total"]
+        )
+        return rows, total or Decimal("0.00")
+
+    # Read-only access: looking at the cart must not mark the session dirty
+    session_cart = request.session.get(SESSION_KEY) or {}
+    if not session_cart:
+        return [], Decimal("0.00")
+    books = Book.objects.in_bulk([int(k) for k in session_cart])
+    rows, total = [], Decimal("0.00")
+    for book_id, book in books.items():
+        qty = int(session_cart.get(str(book_id), 0))
+        line = (book.price or Decimal("0.00")) * qty
+        total += line
+        rows.append({"book": book, "qty": qty, "line": line})
+    return rows, total
+
+
+def add(request, book_id):
+    if request.user.is_authenticated:
+        add_to_cart(_user_cart(request.user), book_id)
+        return
+    session_cart = dict(request.session.get(SESSION_KEY) or {})
+    session_cart[str(book_id)] = int(session_cart.get(str(book_id), 0)) + 1
+    request.session[SESSION_KEY] = session_cart
+
+
+def remove(request, book_id):
+    if request.user.is_authenticated:
+        CartItem.objects.filter(cart__user=request.user, book_id=book_id).delete()
+        return
+    session_cart = request.session.get(SESSION_KEY) or {}
+    if str(book_id) in session_cart:
+        session_cart = dict(session_cart)
+        del session_cart[str(book_id)]
+        request.session[SESSION_KEY] = session_cart
+
+
+def clear(request):
+    if request.user.is_authenticated:
+        CartItem.objects.filter(cart__user=request.user).delete()
+        return
+    if request.session.get(SESSION_KEY):
+        del request.session[SESSION_KEY]
+
+
+def set_quantities(request, quantities):
+    """
+    Set the quantity of each book in {book_id: quantity}; 0 removes it.
+    Signed-in carts take one upsert and one DELETE whatever the size.
+    """
+    book_ids = set(
+        Book.objects.filter(id__in=quantities).values_list("id", flat=True)
+    )
+    keep = {b: q for b, q in quantities.items() if b in book_ids and q > 0}
+    drop = [b for b, q in quantities.items() if b in book_ids and q <= 0]
+
+    if request.user.is_authenticated:
+        cart = _user_cart(request.user)
+        with transaction.atomic():
+            if keep:
+                CartItem.objects.bulk_create(
+                    [CartItem(cart=cart, book_id=b, quantity=q) for b, q in keep.items()],
+                    update_conflicts=True,
+                    unique_fields=["cart", "book"],
+                    update_fields=["quantity"],
+                )
+            if drop:
+                CartItem.objects.filter(cart=cart, book_id__in=drop).delete()
+        return book_ids
+
+    session_cart = dict(request.session.get(SESSION_KEY) or {})
+    before = dict(session_cart)
+    session_cart.update({str(b): q for b, q in keep.items()})
+    for book_id in drop:
+        session_cart.pop(str(book_id), None)
+    if session_cart != before:
+        request.session[SESSION_KEY] = session_cart
+    return book_ids
+
+
+def merge_session_cart(request, user):
+    """Move an anonymous session cart into the user's Cart (on login)"""
+    session_cart = request.session.get(SESSION_KEY)
+    if not session_cart:
+        return
+    cart = _user_cart(user)
+    existing = set(Book.objects.filter(
+        id__in=[int(k) for k in session_cart]
+    ).values_list("id", flat=True))
+    with transaction.atomic():
+        for book_id, qty in session_cart.items():
+            if int(book_id) in existing and int(qty) > 0:
+                add_to_cart(cart, int(book_id), int(qty))
+    del request.session[SESSION_KEY]
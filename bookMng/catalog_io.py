@@ -0,0 +1,231 @@
+"""
+Streaming catalog import/export for the import_books and export_books
+commands.
+
+Both read and write CSV or JSON Lines one row at a time, so memory stays
+flat however big the file is. Imported rows go through BookForm, the same
+rules postbook applies. Pictures are looked up in a local directory and
+stored through the content-addressed picture storage. Valid rows are
+inserted with bulk_create, one transaction per batch. Pictures are stored
+as their rows are validated, so if a batch fails to insert, the blobs it
+stored that no book refers to are deleted again.
+"""
+import csv
+import json
+import os
+import time
+
+from django import forms
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from . import page_cache, search_index
+from .forms import BookForm
+from .models import Book
+from .storage import picture_storage
+
+EXPORT_FIELDS = ("id", "name", "web", "price", "publishdate", "picture", "owner")
+FORMATS = ("csv", "jsonl")
+
+
+def detect_format(path, default="csv"):
+    ext = os.path.splitext(path or "")[1].lower()
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if ext == ".csv":
+        return "csv"
+    return default
+
+
+def read_rows(fp, fmt):
+    """Yield (line number, dict) from a CSV or JSON Lines stream"""
+    if fmt == "csv":
+        reader = csv.DictReader(fp)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_num, line in enumerate(fp, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_num, ValueError(f"invalid JSON: {exc}")
+            continue
+        yield line_num, row if isinstance(row, dict) else ValueError("not an object")
+
+
+class ImportStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.read = 0
+        self.imported = 0
+        self.pictures = 0
+        self.errors = []  # (line number, message)
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.start
+        return self.read / elapsed if elapsed else 0.0
+
+
+class CatalogImporter:
+    """
+    Validate rows with BookForm and bulk insert them ``batch_size`` at a
+    time. Columns: name, web, price, and optionally picture (a path
+    relative to ``images_dir``) and owner (a username).
+    """
+
+    def __init__(self, images_dir=None, owner=None, batch_size=1000,
+                 dry_run=False, progress=None):
+        self.images_dir = images_dir
+        self.default_owner = owner
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.owners = {}
+        self.stats = ImportStats()
+        # Built once: constructing a ModelForm per row (it deep-copies its
+        # fields) costs more than the validation itself
+        self.fields = BookForm().fields
+
+    def clean(self, data, files):
+        """Run BookForm's field validation; returns cleaned data or raises"""
+        cleaned, errors = {}, []
+        for name, field in self.fields.items():
+            if isinstance(field, forms.FileField):
+                value = files.get(name)
+            else:
+                value = data.get(name)
+            try:
+                cleaned[name] = field.clean(value)
+            except ValidationError as exc:
+                errors.append(f"{name}: {' '.join(exc.messages)}")
+        if errors:
+            raise ValueError("; ".join(errors))
+        return cleaned
+
+    def owner_id(self, username):
+        if not username:
+            return self.default_owner.id if self.default_owner else None
+        if username not in self.owners:
+            self.owners[username] = (
+                User.objects.filter(username=username).values_list("id", flat=True).first()
+            )
+        if self.owners[username] is None:
+            raise ValueError(f"unknown owner {username!r}")
+        return self.owners[username]
+
+    def build(self, row):
+        """Return an unsaved Book for a valid row; raise ValueError otherwise"""
+        data = {key: (row.get(key) or "") for key in ("name", "web", "price")}
+        files = {}
+        picture = (row.get("picture") or "").strip()
+        if picture:
+            if not self.images_dir:
+                raise ValueError("picture given but no image directory")
+            path = os.path.join(self.images_dir, picture)
+            if not os.path.isfile(path):
+                raise ValueError(f"picture {picture!r} not found")
+            files["picture"] = File(open(path, "rb"), name=os.path.basename(path))
+
+        try:
+            cleaned = self.clean(data, files)
+            book = Book(
+                name=cleaned["name"],
+                web=cleaned["web"],
+                price=cleaned["price"],
+                username_id=self.owner_id((row.get("owner") or "").strip()),
+            )
+            if files and not self.dry_run:
+                # Saved here rather than by bulk_create so pic_path is known
+                upload = files["picture"]
+                upload.seek(0)
+                book.picture = picture_storage().save(f"books/{upload.name}", upload)
+                book.pic_path = book.picture.name
+                self.stats.pictures += 1
+        finally:
+            for upload in files.values():
+                upload.close()
+        return book
+
+    def flush(self, batch):
+        """Insert one batch (or, on a dry run, just count it as valid)"""
+        if not batch:
+            return
+        if not self.dry_run:
+            with transaction.atomic():
+                created = Book.objects.bulk_create(batch)
+                # bulk_create skips the post_save signals that index books
+                # and evict the catalog pages
+                search_index.index_books(created)
+                page_cache.invalidate(page_cache.CATALOG)
+        self.stats.imported += len(batch)
+
+    def discard_pictures(self, batch):
+        """Delete the pictures stored for an uninserted batch, unless shared"""
+        names = {book.picture.name for book in batch if book.picture}
+        if not names:
+            return
+        referenced = set(
+            Book.objects.filter(picture__in=names).values_list("picture", flat=True)
+        )
+        for name in names - referenced:
+            picture_storage().delete(name)
+
+    def run(self, rows):
+        batch = []
+        try:
+            for line_num, row in rows:
+                self.stats.read += 1
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    batch.append(self.build(row))
+                except ValueError as exc:
+                    self.stats.errors.append((line_num, str(exc)))
+                if len(batch) >= self.batch_size:
+                    self.flush(batch)
+                    batch = []
+                    if self.progress:
+                        self.progress(self.stats)
+            self.flush(batch)
+        except BaseException:
+            self.discard_pictures(batch)
+            raise
+        return self.stats
+
+
+def export_rows(batch_size=2000):
+    """Yield export dicts for every book, oldest first, without model instances"""
+    books = (
+        Book.objects.order_by("id")
+        .values("id", "name", "web", "price", "publishdate", "picture", "username__username")
+    )
+    for row in books.iterator(chunk_size=batch_size):
+        row["owner"] = row.pop("username__username") or ""
+        row["picture"] = row["picture"] or ""
+        yield row
+
+
+def write_rows(fp, rows, fmt):
+    """Write export rows to ``fp``; returns the number written"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(fp, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+    for row in rows:
+        fp.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import MainMenu
+
+MENU_CACHE_KEY = "bookMng:main_menu"
+
+# Process-local copy of the menu, used when no shared cache is configured.
+# The signals only clear this process's copy, so other worker processes
+# reload theirs once it is BOOKMNG_MENU_LOCAL_TTL seconds old.
+_menu_items = None
+_menu_loaded_at = 0.0
+
+
+def _shared_cache():
+    """The Django cache named by BOOKMNG_MENU_CACHE, or None"""
+    alias = getattr(settings, "BOOKMNG_MENU_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def get_menu_items():
+    global _menu_items, _menu_loaded_at
+    cache = _shared_cache()
+    if cache is not None:
+        items = cache.get(MENU_CACHE_KEY)
+        if items is None:
+            items = list(MainMenu.objects.all())
+            cache.set(MENU_CACHE_KEY, items, None)
+        return items
+    ttl = getattr(settings, "BOOKMNG_MENU_LOCAL_TTL", 60)
+    if _menu_items is None or time.monotonic() - _menu_loaded_at >= ttl:
+        _menu_items = list(MainMenu.objects.all())
+        _menu_loaded_at = time.monotonic()
+    return _menu_items
+
+
+def invalidate_menu():
+    global _menu_items
+    _menu_items = None
+    cache = _shared_cache()
+    if cache is not None:
+        cache.delete(MENU_CACHE_KEY)
+
+
+def main_menu(request):
+    """Expose the navigation menu to every template as ``item_list``"""
+    return {"item_list": get_menu_items()}
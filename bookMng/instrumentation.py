@@ -0,0 +1,141 @@
+"""
+Per-request timing data collected by RequestTimingMiddleware.
+
+Each worker process keeps a rolling window of recent request durations per
+URL name, plus cumulative bucket counts, guarded by a lock so threaded
+servers can record concurrently.
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+WINDOW = 1000
+
+# Stats object for the request currently being served on this thread/task
+current_request = ContextVar("bookMng_current_request", default=None)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class RequestStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []  # (duration ms, sql)
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    @property
+    def db_ms(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def slowest_queries(self, n):
+        return sorted(self.queries, key=lambda q: q[0], reverse=True)[:n]
+
+
+class QueryRecorder:
+    """connection.execute_wrapper() hook feeding a RequestStats"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.stats.queries.append(((time.perf_counter() - start) * 1000, sql))
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=WINDOW)
+        self.max_queries = 0
+
+    def add(self, ms, queries):
+        self.count += 1
+        self.total_ms += ms
+        self.recent.append(ms)
+        self.max_queries = max(self.max_queries, queries)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def summary(self):
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": percentile(recent, 50) if recent else 0.0,
+            "p95_ms": percentile(recent, 95) if recent else 0.0,
+            "max_queries": self.max_queries,
+            "buckets": {
+                **{f"le_{b}": n for b, n in zip(BUCKETS_MS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+_histograms = {}
+_lock = threading.Lock()
+
+
+def record(view_name, ms, queries):
+    with _lock:
+        histogram = _histograms.get(view_name)
+        if histogram is None:
+            histogram = _histograms[view_name] = Histogram()
+        histogram.add(ms, queries)
+
+
+def snapshot():
+    with _lock:
+        return {name: h.summary() for name, h in sorted(_histograms.items())}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def instrument_templates():
+    """
+    Time top-level Django template renders. Includes and inheritance go
+    through the engine's own Template class, and nested backend renders are
+    skipped via template_depth, so nothing is counted twice.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "_bookmng_timed", False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        stats = current_request.get()
+        if stats is None or stats.template_depth:
+            return original(self, context, request)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            stats.template_depth -= 1
+            stats.template_ms += (time.perf_counter() - start) * 1000
+
+    render._bookmng_timed = True
+    Template.render = render
@@ -0,0 +1,195 @@
+"""
+Materialized "trending" and "top rated" leaderboards, kept in BookScore.
+
+Trending is time-decayed activity: every rating, favorite and comment adds
+its weight, and the weight halves every BOOKMNG_TRENDING_HALF_LIFE_HOURS.
+Instead of decaying every row as time passes, each event is stored scaled
+up by 2 ** (hours since EPOCH / half life). Every book shares the same decay
+factor at a given moment, so ordering by the stored sum is the same as
+ordering by the current score, and a new event only touches its own book's
+row. The sums grow exponentially, so the column holds their log2.
+
+Top rated is a Bayesian average, (C * m + sum of stars) / (C + ratings).
+Here m is the site-wide mean rating and C is BOOKMNG_TOP_RATED_PRIOR. The
+prior acts like C extra average votes, so one five-star rating doesn't
+outrank fifty four-star ones.
+
+The signals apply each change as it happens. Bulk writes call
+schedule_refresh() instead. recompute() (manage.py recompute_leaderboards)
+rebuilds every row. Run it periodically to pick up drift in the site-wide
+mean and books added by bulk imports.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Book, BookScore, Comment, Favorite, Rating
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+MEAN_CACHE_KEY = "bookMng:leaderboards:mean"
+
+# model -> (timestamp field, weight)
+EVENTS = {
+    Rating: ("created_at", 1.0),
+    Favorite: ("added_at", 2.0),
+    Comment: ("created_at", 1.0),
+}
+
+
+def half_life_hours():
+    return getattr(settings, "BOOKMNG_TRENDING_HALF_LIFE_HOURS", 72)
+
+
+def prior_votes():
+    return getattr(settings, "BOOKMNG_TOP_RATED_PRIOR", 5)
+
+
+def log_weight(when, weight):
+    """log2 of an event's contribution to the trending sum"""
+    hours = (when - EPOCH).total_seconds() / 3600
+    return math.log2(weight) + hours / half_life_hours()
+
+
+def log_add(total, value):
+    """log2(2 ** total + 2 ** value); None stands for an empty sum"""
+    if total is None:
+        return value
+    high, low = max(total, value), min(total, value)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def log_sub(total, value):
+    """log2(2 ** total - 2 ** value), or None once nothing is left"""
+    if total is None:
+        return None
+    remaining = 1 - 2 ** (value - total)
+    if remaining < 1e-9:
+        return None
+    return total + math.log2(remaining)
+
+
+def current_trending(stored, now):
+    """The decayed activity a stored trending value stands for at ``now``"""
+    if stored is None:
+        return 0.0
+    hours = (now - EPOCH).total_seconds() / 3600
+    return 2 ** (stored - hours / half_life_hours())
+
+
+def site_mean():
+    totals = Book.objects.aggregate(count=Sum("rating_count"), stars=Sum("rating_sum"))
+    return totals["stars"] / totals["count"] if totals["count"] else 0.0
+
+
+def prior_mean():
+    """Site-wide mean rating, cached until the next recompute"""
+    mean = cache.get(MEAN_CACHE_KEY)
+    if mean is None:
+        mean = site_mean()
+        cache.set(MEAN_CACHE_KEY, mean, None)
+    return mean
+
+
+def bayesian(count, stars, mean):
+    if not count:
+        return 0.0
+    prior = prior_votes()
+    return (prior * mean + stars) / (prior + count)
+
+
+# ========= Reads =========
+
+def trending(limit=None):
+    limit = limit or getattr(settings, "BOOKMNG_LEADERBOARD_SIZE", 5)
+    return (
+        BookScore.objects.filter(trending__isnull=False)
+        .select_related("book").order_by("-trending")[:limit]
+    )
+
+
+def top_rated(limit=None):
+    limit = limit or getattr(settings, "BOOKMNG_LEADERBOARD_SIZE", 5)
+    return (
+        BookScore.objects.filter(top_rated__gt=0)
+        .select_related("book").order_by("-top_rated")[:limit]
+    )
+
+
+# ========= Writes =========
+
+def record(instance, added=None, removed=None):
+    """
+    Apply one event to its book's row: ``added``/``removed`` is the event
+    instance entering or leaving the trending sum; ratings also refresh the
+    top-rated score from the book's stored counters.
+    """
+    with transaction.atomic():
+        score = BookScore.objects.select_for_update().filter(book_id=instance.book_id).first()
+        if score is None:
+            schedule_refresh([instance.book_id])
+            return
+        fields = []
+        for event, apply in ((added, log_add), (removed, log_sub)):
+            if event is not None:
+                field, weight = EVENTS[type(event)]
+                score.trending = apply(score.trending, log_weight(getattr(event, field), weight))
+                fields.append("trending")
+        if isinstance(instance, Rating):
+            count, stars = Book.objects.filter(pk=instance.book_id).values_list(
+                "rating_count", "rating_sum"
+            ).get()
+            score.top_rated = bayesian(count, stars, prior_mean())
+            fields.append("top_rated")
+        if fields:
+            score.save(update_fields=fields)
+
+
+def trending_sums(book_ids=None):
+    """{book_id: log2 trending sum} straight from the activity tables"""
+    sums = defaultdict(lambda: None)
+    for model, (field, weight) in EVENTS.items():
+        events = model.objects.all()
+        if book_ids is not None:
+            events = events.filter(book_id__in=book_ids)
+        for book_id, when in events.values_list("book_id", field).iterator(chunk_size=5000):
+            sums[book_id] = log_add(sums[book_id], log_weight(when, weight))
+    return sums
+
+
+def recompute(book_ids=None):
+    """
+    Rebuild the BookScore rows of ``book_ids`` (every book by default,
+    which also refreshes the cached site-wide mean). Returns the row count.
+    """
+    books = Book.objects.all()
+    if book_ids is None:
+        mean = site_mean()
+        cache.set(MEAN_CACHE_KEY, mean, None)
+    else:
+        books = books.filter(id__in=book_ids)
+        mean = prior_mean()
+    sums = trending_sums(book_ids)
+    rows = [
+        BookScore(book_id=book_id, trending=sums[book_id], top_rated=bayesian(count, stars, mean))
+        for book_id, count, stars in books.values_list(
+            "id", "rating_count", "rating_sum"
+        ).iterator(chunk_size=5000)
+    ]
+    with transaction.atomic():
+        stale = BookScore.objects.all()
+        if book_ids is not None:
+            stale = stale.filter(book_id__in=book_ids)
+        stale.delete()
+        BookScore.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+def schedule_refresh(book_ids):
+    """Recompute these books' rows after the current transaction commits"""
+    book_ids = sorted(set(book_ids))
+    transaction.on_commit(lambda: recompute(book_ids))
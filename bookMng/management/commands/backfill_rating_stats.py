@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from bookMng.models import Book, Rating
+
+
+class Command(BaseCommand):
+    help = "Recompute Book.rating_count and Book.rating_sum from the Rating table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Number of books updated per bulk_update call",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        stats = {
+            row["book_id"]: (row["count"], row["total"] or 0)
+            for row in Rating.objects.order_by()
+            .values("book_id")
+            .annotate(count=Count("id"), total=Sum("stars"))
+        }
+
+        changed = []
+        with transaction.atomic():
+            books = Book.objects.only("id", "rating_count", "rating_sum")
+            for book in books.iterator(chunk_size=batch_size):
+                count, total = stats.get(book.id, (0, 0))
+                if (book.rating_count, book.rating_sum) != (count, total):
+                    book.rating_count, book.rating_sum = count, total
+                    changed.append(book)
+            Book.objects.bulk_update(
+                changed, ["rating_count", "rating_sum"], batch_size=batch_size
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated rating stats for {len(changed)} book(s)"
+        ))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from bookMng.benchmarks import bench_asgi_wsgi, catalog_paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-request throughput of the catalog views "
+        "under the ASGI handler and under a threaded WSGI handler. Reads the "
+        "existing catalog (see seed_data); nothing is written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, default=32,
+                            help="Requests in flight at once on the ASGI side")
+        parser.add_argument("--wsgi-threads", type=int, default=8,
+                            help="Worker threads on the WSGI side")
+        parser.add_argument("--db-latency-ms", type=float, default=0,
+                            help="Extra delay per SQL query (simulated network DB)")
+        parser.add_argument("--async-views", action="store_true",
+                            help="Also run bookMng.async_views under ASGI")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help="Request this path instead of the defaults (repeatable)")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or catalog_paths()
+        if not paths:
+            raise CommandError("The catalog is empty; run `manage.py seed_data` first")
+
+        # Under deliberate overload every request is "slow"; keep the log quiet
+        with override_settings(BOOKMNG_SLOW_REQUEST_MS=float("inf")):
+            results = bench_asgi_wsgi(
+                paths,
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                wsgi_threads=options["wsgi_threads"],
+                db_latency_ms=options["db_latency_ms"],
+                async_views=options["async_views"],
+            )
+        self.stdout.write(f"{'server':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['server']:<12}{row['requests_per_s']:>10.1f}"
+                f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['errors']:>8}"
+            )
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from bookMng.benchmarks import bench_session_backends
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare cart_add/cart_view throughput across session backends "
+        "(see SESSION_ENGINES in settings). All writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200,
+                            help="cart_add + cart_view pairs per backend")
+        parser.add_argument("--backend", action="append", dest="backends",
+                            help="Only this backend (repeatable)")
+
+    def handle(self, *args, **options):
+        engines = settings.SESSION_ENGINES
+        if options["backends"]:
+            unknown = set(options["backends"]) - set(engines)
+            if unknown:
+                raise CommandError(f"Unknown backend(s): {', '.join(sorted(unknown))}")
+            engines = {name: engines[name] for name in options["backends"]}
+
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                results = bench_session_backends(engines, options["iterations"])
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{'backend':<16}{'req/s':>10}{'p95 ms':>10}{'session writes/req':>20}")
+        for row in results:
+            self.stdout.write(
+                f"{row['backend']:<16}{row['requests_per_s']:>10.1f}"
+                f"{row['p95_ms']:>10.2f}{row['session_writes_per_request']:>20.2f}"
+            )
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from bookMng.benchmarks import bench_views, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every bookMng URL through the test client and report p50/p95 "
+        "latency and query count per view, plus the on_commit work each "
+        "request queues. All writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--seed-books", type=int, default=0,
+            help="Seed a temporary synthetic catalog of this size first",
+        )
+        parser.add_argument("--view", action="append", dest="views",
+                            help="Only benchmark this URL name (repeatable)")
+        parser.add_argument("--max-p95-ms", type=float,
+                            help="Fail if any view's p95 exceeds this")
+        parser.add_argument("--max-queries", type=int,
+                            help="Fail if any view runs more queries than this")
+        parser.add_argument("--json", action="store_true", help="Emit JSON")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                if options["seed_books"]:
+                    seed_dataset(books=options["seed_books"])
+                results = bench_views(options["iterations"], options["views"])
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write(
+                f"{'view':<20}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}"
+                f"{'commit p95':>12}{'commit q':>10}"
+            )
+            for row in results:
+                self.stdout.write(
+                    f"{row['view']:<20}{row['status']:>7}"
+                    f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['queries']:>9}"
+                    f"{row['commit_p95_ms']:>12.2f}{row['commit_queries']:>10}"
+                )
+
+        failures = []
+        for row in results:
+            if options["max_p95_ms"] is not None and row["p95_ms"] > options["max_p95_ms"]:
+                failures.append(f"{row['view']} p95 {row['p95_ms']:.1f}ms")
+            if (options["max_p95_ms"] is not None
+                    and row["commit_p95_ms"] > options["max_p95_ms"]):
+                failures.append(f"{row['view']} on_commit p95 {row['commit_p95_ms']:.1f}ms")
+            if options["max_queries"] is not None and row["queries"] > options["max_queries"]:
+                failures.append(f"{row['view']} {row['queries']} queries")
+        if failures:
+            raise CommandError("Over budget: " + "; ".join(failures))
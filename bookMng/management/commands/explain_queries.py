@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bookMng.benchmarks import explain_hot_queries, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN output for the catalog's hot queries and check each "
+        "uses its index. --seed-books runs against a temporary synthetic "
+        "dataset that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed-books", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["seed_books"]:
+                counts = seed_dataset(books=options["seed_books"])
+                self.stdout.write(f"Seeded {counts}")
+            results = explain_hot_queries()
+            if options["seed_books"]:
+                transaction.set_rollback(True)
+
+        missing = []
+        for label, index, plan, ok in results:
+            status = self.style.SUCCESS("OK") if ok else self.style.ERROR("NO INDEX")
+            self.stdout.write(f"{status} {label} (expects {index})")
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+            if not ok:
+                missing.append(label)
+        if missing:
+            raise CommandError(f"Queries not using their index: {', '.join(missing)}")
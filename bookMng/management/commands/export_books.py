@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookMng.catalog_io import FORMATS, detect_format, export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the catalog to CSV or JSON Lines in a format import_books "
+        "reads back. Picture paths are relative to MEDIA_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-",
+                            help="Output file (default: stdout)")
+        parser.add_argument("--format", choices=FORMATS,
+                            help="Default: from the file extension, else csv")
+        parser.add_argument("--batch-size", type=int, default=2000,
+                            help="Rows fetched per database round trip")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        start = time.perf_counter()
+        rows = export_rows(options["batch_size"])
+        if options["path"] == "-":
+            count = write_rows(self.stdout, rows, fmt)
+            out = self.stderr  # keep stdout clean for the data
+        else:
+            with open(options["path"], "w", newline="", encoding="utf-8") as fp:
+                count = write_rows(fp, rows, fmt)
+            out = self.stdout
+        elapsed = time.perf_counter() - start
+        out.write(f"Exported {count} book(s) - {count / elapsed if elapsed else 0:.0f} rows/s")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from bookMng.models import Book
+from bookMng.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Build listing thumbnails for books that have a picture but none yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true",
+                            help="Rebuild thumbnails for every book with a picture")
+
+    def handle(self, *args, **options):
+        books = Book.objects.exclude(picture="").exclude(picture__isnull=True)
+        if not options["all"]:
+            books = books.filter(thumbnail="")
+        done = 0
+        for book_id in books.values_list("id", flat=True).iterator():
+            try:
+                generate_thumbnails(book_id, force=options["all"])
+            except Exception as exc:
+                self.stderr.write(f"Book {book_id}: {exc}")
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated thumbnails for {done} book(s)"))
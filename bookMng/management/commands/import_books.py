@@ -0,0 +1,74 @@
+import os
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from bookMng.catalog_io import FORMATS, CatalogImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load books from a CSV or JSON Lines file (columns: name, web, "
+        "price, picture, owner). Rows are validated with BookForm; invalid "
+        "ones are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--format", choices=FORMATS,
+                            help="Default: from the file extension, else csv")
+        parser.add_argument("--images", help="Directory the picture column is relative to")
+        parser.add_argument("--owner", help="Username for rows without an owner column")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows per bulk insert / transaction")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Validate only; write nothing")
+        parser.add_argument("--max-errors-shown", type=int, default=20)
+
+    def handle(self, *args, **options):
+        owner = None
+        if options["owner"]:
+            owner = User.objects.filter(username=options["owner"]).first()
+            if owner is None:
+                raise CommandError(f"No user named {options['owner']!r}")
+        if options["images"] and not os.path.isdir(options["images"]):
+            raise CommandError(f"{options['images']} is not a directory")
+
+        fmt = options["format"] or detect_format(options["path"])
+
+        def progress(stats):
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"  {stats.read} rows read, {stats.rows_per_second():.0f} rows/s"
+                )
+
+        importer = CatalogImporter(
+            images_dir=options["images"],
+            owner=owner,
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            progress=progress,
+        )
+        if options["path"] == "-":
+            stats = importer.run(read_rows(sys.stdin, fmt))
+        else:
+            try:
+                fp = open(options["path"], newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(str(exc))
+            with fp:
+                stats = importer.run(read_rows(fp, fmt))
+
+        for line_num, message in stats.errors[:options["max_errors_shown"]]:
+            self.stderr.write(f"line {line_num}: {message}")
+        if stats.rejected > options["max_errors_shown"]:
+            self.stderr.write(f"... and {stats.rejected - options['max_errors_shown']} more")
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats.imported} book(s), rejected {stats.rejected}, "
+            f"{stats.pictures} picture(s) stored - {stats.rows_per_second():.0f} rows/s"
+        ))
+        if stats.pictures:
+            self.stdout.write("Run `manage.py generate_thumbnails` to build their thumbnails.")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookMng import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute every book's 'readers also favorited' neighbours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--k", type=int, default=None,
+            help="Neighbours to keep per book (default BOOKMNG_RECOMMENDATIONS_K)",
+        )
+        parser.add_argument(
+            "--python", action="store_true",
+            help="Use the pure-Python path even when SciPy is installed",
+        )
+
+    def handle(self, *args, **options):
+        if options["k"] is not None and options["k"] < 1:
+            raise CommandError("--k must be at least 1")
+        use_scipy = False if options["python"] else None
+        count = recommendations.rebuild(k=options["k"], use_scipy=use_scipy)
+        engine = "Python" if use_scipy is False or recommendations.sparse is None else "SciPy"
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored neighbours for {count} book(s) ({engine})"
+        ))
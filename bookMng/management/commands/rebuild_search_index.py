@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from bookMng import search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 index used by the search page"
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                "The full-text index is SQLite-only; search uses icontains here."
+            )
+        with transaction.atomic():
+            count = search_index.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} book(s)"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from bookMng import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trending and top-rated leaderboards from scratch"
+
+    def handle(self, *args, **options):
+        count = leaderboards.recompute()
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {count} book(s); site-wide mean rating "
+            f"{leaderboards.prior_mean():.2f}"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bookMng.benchmarks import seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Insert a deterministic synthetic catalog for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--ratings", type=int, default=5, help="Ratings per book")
+        parser.add_argument("--comments", type=int, default=3, help="Comments per book")
+        parser.add_argument("--favorites", type=int, default=5, help="Favorites per book")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counts = seed_dataset(
+                books=options["books"],
+                users=options["users"],
+                ratings=options["ratings"],
+                comments=options["comments"],
+                favorites=options["favorites"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+        summary = ", ".join(f"{n} {kind}" for kind, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary}"))
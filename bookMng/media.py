@@ -0,0 +1,183 @@
+"""
+Production file serving for uploads (MEDIA_ROOT) and collected static files.
+
+Files whose names carry their content hash - content-addressed uploads,
+their thumbnails and ManifestStaticFilesStorage output - are served with a
+strong ETag and ``Cache-Control: immutable``; anything else gets a short
+max-age and an mtime/size ETag. Conditional GETs answer 304, single byte
+ranges answer 206, and full bodies go out through FileResponse so WSGI
+servers can use sendfile. With BOOKMNG_ACCEL_REDIRECT set, the body is left
+to the front-end web server via X-Accel-Redirect instead.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_addressed
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=3600"
+BLOCK_SIZE = 64 * 1024
+
+# ManifestStaticFilesStorage names: base.8f3a2b1c9d0e.css
+MANIFEST_HASHED = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """Read at most ``length`` bytes of ``fp`` starting at ``start``"""
+
+    def __init__(self, fp, start, length):
+        self.fp = fp
+        self.remaining = length
+        fp.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fp.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fp.close()
+
+
+def guess_type(path):
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def file_etag(path, st):
+    name = os.path.basename(path)
+    if is_content_addressed(name):
+        return quote_etag(os.path.splitext(name)[0])
+    return quote_etag(f"{int(st.st_mtime):x}-{st.st_size:x}")
+
+
+def is_immutable(path):
+    name = os.path.basename(path)
+    return is_content_addressed(name) or bool(MANIFEST_HASHED.search(name))
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip() for t in header.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single satisfiable byte range,
+    None to ignore the header, or "unsatisfiable".
+    """
+    match = RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        # An empty file has no bytes to select
+        return "unsatisfiable"
+    if not first:
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+def serve_file(request, path, document_root, accel_prefix=None):
+    try:
+        fullpath = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404("Not found")
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        raise Http404("Not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404("Not found")
+
+    etag = file_etag(fullpath, st)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(st.st_mtime),
+        "Cache-Control": IMMUTABLE if is_immutable(fullpath) else REVALIDATE,
+        "Accept-Ranges": "bytes",
+    }
+
+    inm = request.META.get("HTTP_IF_NONE_MATCH")
+    ims = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    if etag_matches(inm, etag) or (inm is None and ims and int(st.st_mtime) <= ims):
+        response = HttpResponseNotModified()
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    if accel_prefix:
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + path.lstrip("/")
+        response["Content-Type"] = guess_type(fullpath)
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = parse_range(range_header, st.st_size)
+
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{st.st_size}"
+        return response
+
+    fp = open(fullpath, "rb")
+    if byte_range is None:
+        response = FileResponse(fp)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(fp, start, length),
+            status=206,
+            content_type=guess_type(fullpath),
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+        response["Content-Length"] = str(length)
+    response.block_size = BLOCK_SIZE
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    return serve_file(
+        request, path, settings.MEDIA_ROOT,
+        accel_prefix=getattr(settings, "BOOKMNG_ACCEL_REDIRECT", None),
+    )
+
+
+@require_safe
+def serve_static(request, path):
+    return serve_file(request, path, settings.STATIC_ROOT)
@@ -0,0 +1,93 @@
+import logging
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import instrumentation
+
+logger = logging.getLogger("bookMng.slow_requests")
+
+
+class RequestTimingMiddleware:
+    """
+    Measure wall time, DB query count/time and template render time for
+    every request. The numbers go out as a Server-Timing header, into the
+    per-URL-name histograms in bookMng.instrumentation, and - when a request
+    is slower than BOOKMNG_SLOW_REQUEST_MS - into the slow request log
+    together with its worst SQL statements.
+
+    Works in both WSGI and ASGI stacks. Under ASGI the ORM runs in the
+    request's sync_to_async thread, whose connections are not the event
+    loop's, so the query recorder is installed and removed there.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "BOOKMNG_SLOW_REQUEST_MS", 500)
+        self.worst_sql = getattr(settings, "BOOKMNG_SLOW_REQUEST_SQL", 5)
+        instrumentation.instrument_templates()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = instrumentation.RequestStats()
+        token = instrumentation.current_request.set(stats)
+        try:
+            with ExitStack() as stack:
+                self.record_queries(stack, stats)
+                response = self.get_response(request)
+        finally:
+            instrumentation.current_request.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = instrumentation.RequestStats()
+        token = instrumentation.current_request.set(stats)
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.record_queries)(stack, stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            instrumentation.current_request.reset(token)
+        return self.finish(request, response, stats)
+
+    def record_queries(self, stack, stats):
+        recorder = instrumentation.QueryRecorder(stats)
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def finish(self, request, response, stats):
+        total_ms = stats.elapsed_ms()
+        db_ms = stats.db_ms
+        response["Server-Timing"] = ", ".join([
+            f"total;dur={total_ms:.1f}",
+            f'db;dur={db_ms:.1f};desc="{len(stats.queries)} queries"',
+            f"tpl;dur={stats.template_ms:.1f}",
+        ])
+
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match and match.view_name else "<unresolved>"
+        instrumentation.record(view_name, total_ms, len(stats.queries))
+
+        if total_ms >= self.slow_ms:
+            worst = "\n".join(
+                f"  {ms:8.1f} ms  {sql[:500]}"
+                for ms, sql in stats.slowest_queries(self.worst_sql)
+            )
+            logger.warning(
+                "Slow request %s %s (%s): %.1f ms total, %d queries in %.1f ms, "
+                "templates %.1f ms\n%s",
+                request.method, request.get_full_path(), view_name, total_ms,
+                len(stats.queries), db_ms, stats.template_ms, worst,
+            )
+        return response
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+def backfill_rating_stats(apps, schema_editor):
+    Book = apps.get_model('bookMng', 'Book')
+    Rating = apps.get_model('bookMng', 'Rating')
+    stats = (
+        Rating.objects.order_by()
+        .values('book_id')
+        .annotate(count=models.Count('id'), total=models.Sum('stars'))
+    )
+    for row in stats:
+        Book.objects.filter(pk=row['book_id']).update(
+            rating_count=row['count'], rating_sum=row['total'] or 0
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0003_auto_20251106_0543'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
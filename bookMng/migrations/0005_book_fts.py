@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS bookMng_book_fts USING fts5("
+                "name, web, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5; search falls back to icontains
+            return
+        cursor.execute(
+            "INSERT INTO bookMng_book_fts(rowid, name, web) "
+            "SELECT id, name, web FROM bookMng_book"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS bookMng_book_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0004_book_rating_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0007_book_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='thumbnail_webp',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:06
+
+import bookMng.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0008_book_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='picture',
+            field=models.ImageField(blank=True, null=True, storage=bookMng.storage.picture_storage, upload_to='books/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0011_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='bookMng.book')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_of', to='bookMng.book')),
+            ],
+            options={
+                'ordering': ['book', 'rank'],
+                'indexes': [models.Index(fields=['book', 'rank'], name='neighbor_book_rank_idx')],
+                'unique_together': {('book', 'neighbor')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0012_book_neighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookScore',
+            fields=[
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard', serialize=False, to='bookMng.book')),
+                ('trending', models.FloatField(blank=True, null=True)),
+                ('top_rated', models.FloatField(default=0.0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-trending'], name='bookscore_trending_idx'), models.Index(fields=['-top_rated'], name='bookscore_top_rated_idx')],
+            },
+        ),
+    ]
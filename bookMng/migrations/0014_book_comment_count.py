@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:38
+
+from django.db import migrations, models
+
+
+def backfill_comment_counts(apps, schema_editor):
+    Book = apps.get_model('bookMng', 'Book')
+    Comment = apps.get_model('bookMng', 'Comment')
+    counts = (
+        Comment.objects.order_by()
+        .values('book_id')
+        .annotate(count=models.Count('id'))
+    )
+    for row in counts:
+        Book.objects.filter(pk=row['book_id']).update(comment_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0013_book_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0014_book_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
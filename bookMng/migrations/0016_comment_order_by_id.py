@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookMng', '0015_book_views'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_book_recent_idx',
+        ),
+    ]
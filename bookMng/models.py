@@ -1,5 +1,9 @@
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from django.db import models
+from django.db.models.functions import Coalesce, Now
+
+from .storage import picture_storage
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -11,25 +15,150 @@ class MainMenu(models.Model):
         return self.item
 
 
+class BookQuerySet(models.QuerySet):
+    def with_listing_data(self):
+        """Annotate everything a book card shows, in a single SQL statement"""
+        favorites = (
+            Favorite.objects.filter(book=models.OuterRef('pk'))
+            .order_by().values('book').annotate(n=models.Count('id')).values('n')
+        )
+        return self.select_related('username').annotate(
+            avg_rating=models.Case(
+                models.When(
+                    rating_count__gt=0,
+                    then=models.ExpressionWrapper(
+                        models.F('rating_sum') * 1.0 / models.F('rating_count'),
+                        output_field=models.FloatField(),
+                    ),
+                ),
+                default=models.Value(0.0),
+                output_field=models.FloatField(),
+            ),
+            favorite_count=Coalesce(
+                models.Subquery(favorites, output_field=models.IntegerField()), 0
+            ),
+        )
+
+    def bump_version(self, **updates):
+        """Invalidate cached fragments of every book in the queryset"""
+        return self.update(
+            version=models.F('version') + 1, updated_at=Now(), **updates
+        )
+
+    def refresh_rating_stats(self):
+        """
+        Recount rating_count/rating_sum from the Rating rows in one UPDATE,
+        for writes that bypass the Rating signals (bulk_create, bulk delete).
+        """
+        ratings = Rating.objects.filter(book=models.OuterRef('pk')).order_by().values('book')
+        return self.bump_version(
+            rating_count=Coalesce(models.Subquery(
+                ratings.annotate(n=models.Count('id')).values('n'),
+                output_field=models.IntegerField(),
+            ), 0),
+            rating_sum=Coalesce(models.Subquery(
+                ratings.annotate(total=models.Sum('stars')).values('total'),
+                output_field=models.IntegerField(),
+            ), 0),
+        )
+
+    def refresh_comment_counts(self):
+        """Recount comment_count in one UPDATE, for bulk-inserted comments"""
+        comments = Comment.objects.filter(book=models.OuterRef('pk')).order_by().values('book')
+        return self.bump_version(
+            comment_count=Coalesce(models.Subquery(
+                comments.annotate(n=models.Count('id')).values('n'),
+                output_field=models.IntegerField(),
+            ), 0),
+        )
+
+
 class Book(models.Model):
     name = models.CharField(max_length=200)
     web = models.URLField(max_length=300, blank=True)
     price = models.DecimalField(decimal_places=2, max_digits=8)
     publishdate = models.DateField(auto_now=True)
-    picture = models.ImageField(upload_to='books/', blank=True, null=True)
+    picture = models.ImageField(
+        upload_to='books/', storage=picture_storage, blank=True, null=True
+    )
     pic_path = models.CharField(max_length=300, editable=False, blank=True)
+    # Listing-size variants of picture, filled in by bookMng.thumbnails
+    thumbnail = models.CharField(max_length=300, editable=False, blank=True)
+    thumbnail_webp = models.CharField(max_length=300, editable=False, blank=True)
     username = models.ForeignKey(User, blank=True, null=True, on_delete=models.CASCADE)
+    # Denormalized rating aggregates, maintained by the Rating signals
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    # Denormalized, maintained by the Comment signals
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Page views, written in batches by bookMng.view_counts
+    views = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever anything shown on the book's card changes; keys the
+    # rendered-fragment cache
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Moves with version; the API's Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookQuerySet.as_manager()
+
+    # Denormalized columns a full save() leaves alone
+    COUNTER_FIELDS = ('rating_count', 'rating_sum', 'comment_count', 'views')
+
+    class Meta:
+        indexes = [
+            # Catalog/search keyset order and mybooks' owner filter + order
+            models.Index(fields=['name', 'id'], name='book_name_id_idx'),
+            models.Index(fields=['username', 'name', 'id'], name='book_owner_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            # The counters are maintained with F() updates elsewhere; writing
+            # back this instance's copy would undo concurrent changes
+            update_fields = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        # Bumped in SQL so concurrent bumps can't hand out the same version
+        self.version = models.F('version') + 1
+        kwargs['update_fields'] = {*update_fields, 'version', 'updated_at'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+
+    @classmethod
+    def bump_version(cls, book_id, **updates):
+        """Invalidate a book's cached fragments, applying any other F() updates"""
+        cls.objects.filter(pk=book_id).bump_version(**updates)
+
+    @property
+    def thumbnail_url(self):
+        return default_storage.url(self.thumbnail) if self.thumbnail else ''
+
+    @property
+    def thumbnail_webp_url(self):
+        return default_storage.url(self.thumbnail_webp) if self.thumbnail_webp else ''
+
     def average_rating(self):
-        """Calculate average rating for this book"""
-        ratings = self.rating_set.all()
-        if ratings:
-            return sum(r.stars for r in ratings) / len(ratings)
+        """Average rating for this book, read from the stored aggregates"""
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
         return 0
 
+    def recompute_rating_stats(self):
+        """Rebuild rating_count/rating_sum from the Rating rows"""
+        stats = self.rating_set.aggregate(
+            count=models.Count('id'), total=models.Sum('stars')
+        )
+        self.rating_count = stats['count']
+        self.rating_sum = stats['total'] or 0
+        self.save(update_fields=['rating_count', 'rating_sum'])
+
 
 class Comment(models.Model):
     """Comments on books"""
@@ -39,7 +168,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-created_at']
+        # Newest first by id: ids are assigned in insert order and
+        # created_at is auto_now_add, so the two orders agree, and id is
+        # unique, which keyset pagination over comments needs. The book
+        # foreign key's own index serves it: SQLite keeps its entries in
+        # (book_id, rowid) order, so this needs no index of its own
+        ordering = ['-id']
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.book.name}"
@@ -61,6 +195,13 @@ class Rating(models.Model):
     def __str__(self):
         return f"{self.user.username} rated {self.book.name} - {self.stars} stars"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored value so an update can apply a delta
+        instance._loaded_stars = getattr(instance, 'stars', None)
+        return instance
+
 
 class Favorite(models.Model):
     """User's favorite books"""
@@ -71,6 +212,77 @@ class Favorite(models.Model):
     class Meta:
         unique_together = ('user', 'book')
         ordering = ['-added_at']
+        indexes = [
+            models.Index(fields=['user', '-added_at'], name='favorite_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} favorited {self.book.name}"
+
+
+class Cart(models.Model):
+    """Shopping cart for a signed-in user (anonymous carts live in the session)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Cart of {self.user.username}"
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('cart', 'book')
+        ordering = ['added_at', 'id']
+
+    def __str__(self):
+        return f"{self.quantity} x {self.book.name}"
+
+
+class BookNeighbor(models.Model):
+    """
+    One of a book's top-K most similar books ("readers who favorited this
+    also favorited"), maintained by bookMng.recommendations.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='neighbor_of')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('book', 'neighbor')
+        ordering = ['book', 'rank']
+        indexes = [
+            models.Index(fields=['book', 'rank'], name='neighbor_book_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} -> {self.neighbor_id} ({self.score:.3f})"
+
+
+class BookScore(models.Model):
+    """
+    Leaderboard scores for a book, maintained by bookMng.leaderboards so the
+    index page can read the top N straight off an index.
+    """
+    book = models.OneToOneField(
+        Book, on_delete=models.CASCADE, primary_key=True, related_name='leaderboard'
+    )
+    # log2 of the epoch-scaled activity sum (see leaderboards); null if none
+    trending = models.FloatField(null=True, blank=True)
+    # Bayesian average rating; 0 for unrated books
+    top_rated = models.FloatField(default=0.0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trending'], name='bookscore_trending_idx'),
+            models.Index(fields=['-top_rated'], name='bookscore_top_rated_idx'),
+        ]
+
+    def __str__(self):
+        trending = "—" if self.trending is None else f"{self.trending:.3g}"
+        return f"{self.book_id}: trending {trending}, top rated {self.top_rated:.2f}"
@@ -0,0 +1,164 @@
+"""
+Full-page cache for anonymous visitors.
+
+cache_anonymous_page wraps the hot catalog views. The cache is
+BOOKMNG_PAGE_CACHE and entries are keyed by the full URL. A GET or HEAD
+is answered from it only when the visitor has no login, no cart and no
+pending messages; every other request goes straight to the view.
+
+Views label their page with tags through add_tags():
+- "book:<id>" for every book the page shows
+- "catalog" for pages whose list of books can change
+Every page also carries "layout", for the navigation menu. The model
+signals invalidate tags as the data changes.
+
+Invalidation works by version. Each tag has a token in the cache, and a
+stored page records the tokens it was rendered under. Replacing a tag's
+token makes every page carrying that tag a miss, without having to know
+which URLs those pages were.
+"""
+import asyncio
+import hashlib
+import secrets
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY as AUTH_SESSION_KEY
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+
+from .cart import SESSION_KEY as CART_SESSION_KEY
+
+PAGE_PREFIX = "bookMng:page:"
+TAG_PREFIX = "bookMng:page-tag:"
+
+LAYOUT = "layout"
+CATALOG = "catalog"
+RECOMMENDATIONS = "recommendations"
+
+
+def book_tag(book_id):
+    return f"book:{book_id}"
+
+
+def _cache():
+    """The Django cache named by BOOKMNG_PAGE_CACHE, or None when disabled"""
+    alias = getattr(settings, "BOOKMNG_PAGE_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def _new_version():
+    return secrets.token_hex(8)
+
+
+def current_versions(cache, tags):
+    keys = {TAG_PREFIX + tag: tag for tag in tags}
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        for key in keys.keys() - found.keys():
+            cache.add(key, _new_version(), None)
+        found = cache.get_many(keys)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def invalidate(*tags):
+    """
+    Evict every cached page carrying any of ``tags``. This happens straight
+    away and again once the transaction commits, so a page re-rendered from
+    not-yet-committed data in between doesn't survive.
+    """
+    cache = _cache()
+    if cache is None or not tags:
+        return
+    def bump():
+        cache.set_many({TAG_PREFIX + tag: _new_version() for tag in tags}, None)
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_books(book_ids):
+    invalidate(*(book_tag(book_id) for book_id in book_ids))
+
+
+def add_tags(request, *tags):
+    """Label the page being rendered for ``request``"""
+    tagged = getattr(request, "page_cache_tags", None)
+    if tagged is not None:
+        tagged.update(tags)
+
+
+def is_anonymous_visit(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if CookieStorage.cookie_name in request.COOKIES:
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        session = request.session
+        if (session.get(AUTH_SESSION_KEY) or session.get(CART_SESSION_KEY)
+                or session.get("_messages")):
+            return False
+    return True
+
+
+def page_key(request):
+    url = request.build_absolute_uri()
+    return PAGE_PREFIX + hashlib.sha256(url.encode()).hexdigest()
+
+
+def fetch(request):
+    """Return (cache key, cached response); a None key means bypass the cache"""
+    cache = _cache()
+    if cache is None or not is_anonymous_visit(request):
+        return None, None
+    key = page_key(request)
+    entry = cache.get(key)
+    if entry is not None and current_versions(cache, entry["versions"]) == entry["versions"]:
+        response = HttpResponse(entry["content"], status=entry["status"])
+        for header, value in entry["headers"]:
+            response[header] = value
+        return key, response
+    request.page_cache_tags = {LAYOUT}
+    return key, None
+
+
+def store(request, key, response):
+    session = getattr(request, "session", None)
+    if (response.status_code != 200 or response.streaming or response.cookies
+            or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            or (session is not None and session.modified)):
+        return
+    cache = _cache()
+    cache.set(key, {
+        "versions": current_versions(cache, request.page_cache_tags),
+        "status": response.status_code,
+        "headers": list(response.items()),
+        "content": response.content,
+    }, getattr(settings, "BOOKMNG_PAGE_CACHE_TIMEOUT", 300))
+
+
+def cache_anonymous_page(view):
+    """Serve ``view`` (sync or async) from the page cache for anonymous GETs"""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            key, cached = await sync_to_async(fetch)(request)
+            if cached is not None:
+                return cached
+            response = await view(request, *args, **kwargs)
+            if key is not None:
+                await sync_to_async(store)(request, key, response)
+            return response
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, cached = fetch(request)
+            if cached is not None:
+                return cached
+            response = view(request, *args, **kwargs)
+            if key is not None:
+                store(request, key, response)
+            return response
+    return wrapper
@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "bookMng.pagination"
+MAX_PAGE_SIZE = 100
+
+
+def get_page_size(request):
+    """Page size from ?page_size=, falling back to BOOKMNG_PAGE_SIZE"""
+    default = getattr(settings, "BOOKMNG_PAGE_SIZE", 24)
+    try:
+        size = int(request.GET.get("page_size", default))
+    except ValueError:
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values, direction):
+    return signing.dumps([direction, list(values)], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """Return (direction, values), or (None, None) for a missing/bad token"""
+    if not token:
+        return None, None
+    try:
+        direction, values = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None, None
+    if direction not in ("next", "prev"):
+        return None, None
+    return direction, values
+
+
+def _seek(fields, values, forward):
+    """
+    Row-value comparison (f1, f2, ...) > (v1, v2, ...) expanded into Q objects,
+    so the database can walk the (f1, f2, ...) index instead of using OFFSET.
+    A "-field" compares the other way; ``forward=False`` flips every field.
+    """
+    condition = Q()
+    names = [f.lstrip("-") for f in fields]
+    for i, field in enumerate(fields):
+        op = "gt" if field.startswith("-") != forward else "lt"
+        lookup = {names[j]: values[j] for j in range(i)}
+        lookup[f"{names[i]}__{op}"] = values[i]
+        condition |= Q(**lookup)
+    return condition
+
+
+def _reverse(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class KeysetPage:
+    def __init__(self, items, fields, has_next, has_prev):
+        self.items = items
+        self.fields = fields
+        self.has_next = has_next
+        self.has_prev = has_prev
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def _key(self, obj):
+        names = [f.lstrip("-") for f in self.fields]
+        if isinstance(obj, dict):  # rows from .values()
+            return [obj[f] for f in names]
+        return [getattr(obj, f) for f in names]
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.items:
+            return encode_cursor(self._key(self.items[-1]), "next")
+        return ""
+
+    @property
+    def prev_cursor(self):
+        if self.has_prev and self.items:
+            return encode_cursor(self._key(self.items[0]), "prev")
+        return ""
+
+
+def _page_queryset(queryset, cursor, page_size, fields):
+    """Return (direction, the sliced queryset to fetch) for one page"""
+    direction, values = decode_cursor(cursor)
+    if values is not None and len(values) != len(fields):
+        direction, values = None, None
+
+    if direction == "prev":
+        qs = queryset.filter(_seek(fields, values, forward=False))
+        qs = qs.order_by(*[_reverse(f) for f in fields])
+    elif direction == "next":
+        qs = queryset.filter(_seek(fields, values, forward=True)).order_by(*fields)
+    else:
+        qs = queryset.order_by(*fields)
+    return direction, qs[:page_size + 1]
+
+
+def keyset_paginate(queryset, cursor, page_size, fields=("name", "id")):
+    """
+    Return one KeysetPage of ``queryset`` ordered by ``fields`` ("-name" for
+    descending). The last field must be unique (normally the primary key).
+    """
+    direction, qs = _page_queryset(queryset, cursor, page_size, fields)
+    return build_page(list(qs), fields, direction, page_size)
+
+
+async def akeyset_paginate(queryset, cursor, page_size, fields=("name", "id")):
+    """keyset_paginate() for async views"""
+    direction, qs = _page_queryset(queryset, cursor, page_size, fields)
+    return build_page([obj async for obj in qs], fields, direction, page_size)
+
+
+def build_page(rows, fields, direction, page_size):
+    """
+    Turn up to page_size + 1 rows fetched in seek order into a KeysetPage.
+    Rows for a "prev" page arrive in reverse order and are flipped back.
+    """
+    extra = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == "prev":
+        return KeysetPage(rows[::-1], fields, has_next=True, has_prev=extra)
+    return KeysetPage(rows, fields, has_next=extra, has_prev=direction == "next")
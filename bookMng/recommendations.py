@@ -0,0 +1,289 @@
+"""
+Item-item recommendations: "readers who favorited this also favorited".
+
+Every (user, book) interaction becomes a weight - 1.0 for a favorite,
+stars / 5 for a rating, the larger if both. Two books are similar when the
+same readers engage with both: cosine similarity of their columns in the
+user x book matrix. Each book's top BOOKMNG_RECOMMENDATIONS_K neighbours
+are stored in BookNeighbor, so pages read them with one indexed lookup.
+
+rebuild() recomputes everything. With SciPy installed it does this as a
+sparse matrix product (X.T @ X); otherwise it falls back to accumulating
+co-occurrences in plain Python. Both paths give the same scores.
+Favorites and ratings call schedule_refresh(). It collects the changed
+books and, once the transaction commits, hands them to a background worker
+(the thumbnail thread pool; BOOKMNG_THUMBNAIL_WORKERS = 0 runs it inline).
+Books changed while a refresh is running are picked up by the next one. A
+refresh recomputes the lists of the changed books in one pass, and patches
+their scores into the lists that contain them or should now contain them.
+Only lists whose ranking actually changed are rewritten. A book that drops
+out of a full list is only replaced at the next rebuild (manage.py
+rebuild_recommendations).
+"""
+import logging
+import math
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from . import page_cache, thumbnails
+from .models import Book, BookNeighbor, Favorite, Rating
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional; the pure-Python path is used instead
+    np = sparse = None
+
+logger = logging.getLogger(__name__)
+
+FAVORITE_WEIGHT = 1.0
+
+
+def top_k():
+    return getattr(settings, "BOOKMNG_RECOMMENDATIONS_K", 10)
+
+
+def neighbors_of(book_id):
+    """A book's stored neighbours, best first (the book_id, rank index)"""
+    return (
+        BookNeighbor.objects.filter(book_id=book_id)
+        .select_related("neighbor").order_by("rank")
+    )
+
+
+def for_user(user, limit=8):
+    """Neighbours of the user's favorites that they haven't favorited yet"""
+    return (
+        Book.objects.filter(neighbor_of__book__favorite__user=user)
+        .exclude(favorite__user=user)
+        .annotate(score=Sum("neighbor_of__score"))
+        .order_by("-score", "id")[:limit]
+    )
+
+
+def load_interactions(book_ids=None, user_ids=None):
+    """{(user_id, book_id): weight}, optionally limited to some books/users"""
+    favorites = Favorite.objects.all()
+    ratings = Rating.objects.all()
+    if book_ids is not None:
+        favorites = favorites.filter(book_id__in=book_ids)
+        ratings = ratings.filter(book_id__in=book_ids)
+    if user_ids is not None:
+        favorites = favorites.filter(user_id__in=user_ids)
+        ratings = ratings.filter(user_id__in=user_ids)
+
+    weights = {}
+    for key in favorites.values_list("user_id", "book_id").iterator(chunk_size=5000):
+        weights[key] = FAVORITE_WEIGHT
+    for user_id, book_id, stars in ratings.values_list(
+        "user_id", "book_id", "stars"
+    ).iterator(chunk_size=5000):
+        key = (user_id, book_id)
+        weights[key] = max(weights.get(key, 0.0), stars / 5)
+    return weights
+
+
+def best(scores, k):
+    """The k highest (neighbor, score) pairs, ties broken by lower id"""
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def _similar_python(weights, k):
+    by_user = defaultdict(list)
+    norms = defaultdict(float)
+    for (user_id, book_id), weight in weights.items():
+        by_user[user_id].append((book_id, weight))
+        norms[book_id] += weight * weight
+    dots = defaultdict(lambda: defaultdict(float))
+    for items in by_user.values():
+        for a, wa in items:
+            for b, wb in items:
+                if a != b:
+                    dots[a][b] += wa * wb
+    return {
+        a: best({b: dot / math.sqrt(norms[a] * norms[b]) for b, dot in row.items()}, k)
+        for a, row in dots.items()
+    }
+
+
+def _similar_scipy(weights, k):
+    keys = np.array(list(weights.keys()), dtype=np.int64).reshape(-1, 2)
+    values = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    users, user_index = np.unique(keys[:, 0], return_inverse=True)
+    books, book_index = np.unique(keys[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (values, (user_index, book_index)), shape=(len(users), len(books))
+    )
+    co = (matrix.T @ matrix).tocsr()
+    co.setdiag(0)
+    co.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    # Cosine: scale entry (i, j) by 1 / (|i| |j|), column then row
+    inv = sparse.diags(1.0 / norms)
+    similarity = (inv @ co @ inv).tocsr()
+
+    result = {}
+    for i in range(similarity.shape[0]):
+        start, end = similarity.indptr[i], similarity.indptr[i + 1]
+        if start == end:
+            continue
+        scores = dict(zip(
+            books[similarity.indices[start:end]].tolist(),
+            similarity.data[start:end].tolist(),
+        ))
+        result[int(books[i])] = best(scores, k)
+    return result
+
+
+def similar_books(weights, k, use_scipy=None):
+    """{book_id: [(neighbor_id, score), ...]} from interaction weights"""
+    if not weights:
+        return {}
+    if use_scipy is None:
+        use_scipy = sparse is not None
+    return (_similar_scipy if use_scipy else _similar_python)(weights, k)
+
+
+def neighbor_rows(book_id, ranked):
+    return [
+        BookNeighbor(book_id=book_id, neighbor_id=neighbor_id, score=score, rank=rank)
+        for rank, (neighbor_id, score) in enumerate(ranked, start=1)
+    ]
+
+
+def rebuild(k=None, use_scipy=None):
+    """Recompute every book's neighbours; returns the number of books with any"""
+    k = k or top_k()
+    neighbors = similar_books(load_interactions(), k, use_scipy)
+    rows = [row for book_id, ranked in neighbors.items() for row in neighbor_rows(book_id, ranked)]
+    with transaction.atomic():
+        BookNeighbor.objects.all().delete()
+        BookNeighbor.objects.bulk_create(rows, batch_size=2000)
+        page_cache.invalidate(page_cache.RECOMMENDATIONS)
+    return len(neighbors)
+
+
+def same_ranking(stored, ranked):
+    """True when two [(neighbor, score), ...] lists agree up to float noise"""
+    return len(stored) == len(ranked) and all(
+        a == b and math.isclose(x, y, rel_tol=1e-9)
+        for (a, x), (b, y) in zip(stored, ranked)
+    )
+
+
+def refresh(book_ids, k=None):
+    """
+    Bring the neighbours of ``book_ids``, and their places in other books'
+    lists, up to date. Returns the ids of the books whose lists were
+    rewritten.
+    """
+    k = k or top_k()
+    changed = set(book_ids)
+    readers = {user_id for user_id, _ in load_interactions(book_ids=changed)}
+    related = load_interactions(user_ids=readers)
+    candidates = {b for _, b in related}
+    listing = set(
+        BookNeighbor.objects.filter(neighbor_id__in=changed).values_list("book_id", flat=True)
+    )
+
+    # Norms need each candidate's full column, not just the shared readers
+    norms = defaultdict(float)
+    for (_, b), weight in load_interactions(book_ids=candidates | changed).items():
+        norms[b] += weight * weight
+    by_user = defaultdict(list)
+    for (user_id, b), weight in related.items():
+        by_user[user_id].append((b, weight))
+    dots = defaultdict(lambda: defaultdict(float))
+    for items in by_user.values():
+        for a, wa in items:
+            if a in changed:
+                for b, wb in items:
+                    if b != a:
+                        dots[a][b] += wa * wb
+    scores = {
+        a: {b: dot / math.sqrt(norms[a] * norms[b]) for b, dot in row.items()}
+        for a, row in dots.items()
+    }
+
+    affected = candidates | listing | changed
+    stored = defaultdict(list)
+    for book_id, neighbor_id, score in (
+        BookNeighbor.objects.filter(book_id__in=affected)
+        .order_by("book_id", "rank").values_list("book_id", "neighbor_id", "score")
+    ):
+        stored[book_id].append((neighbor_id, score))
+
+    wanted = {a: best(scores.get(a, {}), k) for a in changed}
+    for other in affected - changed:
+        others = dict(stored[other])
+        for a in changed:
+            others.pop(a, None)
+            if other in scores.get(a, {}):
+                others[a] = scores[a][other]
+        wanted[other] = best(others, k)
+
+    rewrite = sorted(
+        book_id for book_id, ranked in wanted.items()
+        if not same_ranking(stored[book_id], ranked)
+    )
+    if rewrite:
+        with transaction.atomic():
+            BookNeighbor.objects.filter(book_id__in=rewrite).delete()
+            BookNeighbor.objects.bulk_create(
+                [row for book_id in rewrite for row in neighbor_rows(book_id, wanted[book_id])]
+            )
+            page_cache.invalidate_books(rewrite)
+    return rewrite
+
+
+# Books waiting for a refresh, and whether a worker is already on them
+_pending = set()
+_pending_lock = threading.Lock()
+_queued = False
+
+
+def _drain():
+    """Refresh pending books until none are left"""
+    global _queued
+    while True:
+        with _pending_lock:
+            book_ids = set(_pending)
+            _pending.clear()
+            if not book_ids:
+                _queued = False
+                return
+        try:
+            refresh(book_ids)
+        except Exception:
+            logger.exception("Recommendation refresh failed for %d book(s)", len(book_ids))
+
+
+def _run():
+    try:
+        _drain()
+    finally:
+        # Worker threads hold their own DB connections
+        connection.close()
+
+
+def schedule_refresh(book_ids):
+    """Queue these books for a refresh after the current transaction commits"""
+    book_ids = set(book_ids)
+
+    def submit():
+        global _queued
+        with _pending_lock:
+            _pending.update(book_ids)
+            if _queued:
+                return
+            _queued = True
+        if getattr(settings, "BOOKMNG_THUMBNAIL_WORKERS", 2) == 0:
+            _drain()
+        else:
+            thumbnails._get_executor().submit(_run)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,151 @@
+"""
+Full-text search over books.
+
+On SQLite the catalog is mirrored into an FTS5 virtual table (rowid = book id)
+that is kept in sync by the Book signals and ranked with bm25, giving a name
+match ten times the weight of a website match. Other databases, or SQLite
+builds without FTS5, fall back to the old icontains filter.
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Q
+
+from .models import Book
+from .pagination import KeysetPage, build_page, decode_cursor, keyset_paginate
+
+FTS_TABLE = "bookMng_book_fts"
+RANK = f"bm25({FTS_TABLE}, 10.0, 1.0)"
+RANK_FIELDS = ("search_rank", "id")
+
+_fts_tables = {}
+
+
+def fts_enabled():
+    """True when the FTS5 table exists on the current database"""
+    if connection.vendor != "sqlite":
+        return False
+    key = connection.settings_dict["NAME"]
+    if key not in _fts_tables:
+        _fts_tables[key] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[key]
+
+
+def create_fts_table(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, web, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def rebuild_index():
+    """Repopulate the FTS table from bookMng_book; returns the row count"""
+    with connection.cursor() as cursor:
+        create_fts_table(cursor)
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, web) "
+            f"SELECT id, name, web FROM {Book._meta.db_table}"
+        )
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        count = cursor.fetchone()[0]
+    _fts_tables[connection.settings_dict["NAME"]] = True
+    return count
+
+
+def index_book(book):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [book.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, web) VALUES (%s, %s, %s)",
+            [book.pk, book.name, book.web],
+        )
+
+
+def index_books(books):
+    """Add freshly bulk-created books (which skip the signals) to the index"""
+    if not fts_enabled() or not books:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, web) VALUES (%s, %s, %s)",
+            [(book.pk, book.name, book.web) for book in books],
+        )
+
+
+def unindex_book(book_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [book_id])
+
+
+def match_expression(q):
+    """
+    Turn free text into an FTS5 query: every word must match, each as a
+    prefix. Quoting the terms keeps FTS5 operators in user input inert.
+    """
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_books(q, cursor, page_size, columns=None):
+    """
+    Return one KeysetPage of books matching ``q``, best match first. With
+    ``columns`` (which must include "id", "name") the page holds
+    ``.values(*columns)`` dicts instead of Book instances.
+    """
+    books = Book.objects.with_listing_data()
+    if not fts_enabled():
+        books = books.filter(Q(name__icontains=q) | Q(web__icontains=q))
+        if columns:
+            books = books.values(*columns)
+        return keyset_paginate(books, cursor, page_size)
+
+    expr = match_expression(q)
+    if not expr:
+        return KeysetPage([], RANK_FIELDS, has_next=False, has_prev=False)
+
+    direction, values = decode_cursor(cursor)
+    if values is not None and len(values) != len(RANK_FIELDS):
+        direction, values = None, None
+
+    sql = f"SELECT rowid, {RANK} AS r FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [expr]
+    if direction:
+        op = "<" if direction == "prev" else ">"
+        sql += f" AND ({RANK} {op} %s OR ({RANK} = %s AND rowid {op} %s))"
+        params += [values[0], values[0], values[1]]
+    if direction == "prev":
+        sql += " ORDER BY r DESC, rowid DESC LIMIT %s"
+    else:
+        sql += " ORDER BY r, rowid LIMIT %s"
+    params.append(page_size + 1)
+
+    with connection.cursor() as c:
+        c.execute(sql, params)
+        hits = c.fetchall()
+
+    books = books.filter(id__in=[book_id for book_id, _ in hits])
+    if columns:
+        found = {row["id"]: row for row in books.values(*columns)}
+    else:
+        found = {book.id: book for book in books}
+    rows = []
+    for book_id, rank in hits:
+        book = found.get(book_id)
+        if book is None:
+            continue
+        if columns:
+            book["search_rank"] = rank
+        else:
+            book.search_rank = rank
+        rows.append(book)
+    return build_page(rows, RANK_FIELDS, direction, page_size)
+
+
+# The FTS query is raw SQL, which has no async API
+asearch_books = sync_to_async(search_books)
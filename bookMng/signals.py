@@ -0,0 +1,177 @@
+from django.contrib.auth.signals import user_logged_in
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import cart, leaderboards, page_cache, recommendations, search_index
+from .context_processors import invalidate_menu
+from .models import Book, Comment, Favorite, MainMenu, Rating
+
+
+# ========= Rating aggregates =========
+
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, **kwargs):
+    """Apply the change in stars to the book's stored aggregates"""
+    if created:
+        Book.bump_version(
+            instance.book_id,
+            rating_count=F('rating_count') + 1,
+            rating_sum=F('rating_sum') + instance.stars,
+        )
+    else:
+        old_stars = getattr(instance, '_loaded_stars', None)
+        if old_stars is None:
+            # Saved without being loaded first; fall back to a full recount
+            Book.objects.get(pk=instance.book_id).recompute_rating_stats()
+        elif old_stars != instance.stars:
+            Book.bump_version(
+                instance.book_id,
+                rating_sum=F('rating_sum') + (instance.stars - old_stars),
+            )
+    instance._loaded_stars = instance.stars
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    """Remove a deleted rating from the book's stored aggregates"""
+    stars = getattr(instance, '_loaded_stars', None) or instance.stars
+    Book.objects.filter(pk=instance.book_id, rating_count__gt=0).bump_version(
+        rating_count=F('rating_count') - 1,
+        rating_sum=F('rating_sum') - stars,
+    )
+
+
+# ========= Comment count =========
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        Book.bump_version(instance.book_id, comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Book.objects.filter(pk=instance.book_id, comment_count__gt=0).bump_version(
+        comment_count=F('comment_count') - 1,
+    )
+
+
+# ========= Fragment cache versions =========
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def book_activity_changed(sender, instance, **kwargs):
+    """The favorite count is part of the cached book card"""
+    Book.bump_version(instance.book_id)
+
+
+# ========= Recommendations =========
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def reader_signal_changed(sender, instance, **kwargs):
+    recommendations.schedule_refresh([instance.book_id])
+
+
+# ========= Leaderboards =========
+
+@receiver(post_save, sender=Rating)
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Comment)
+def activity_saved(sender, instance, created, **kwargs):
+    """New activity counts towards trending; any rating change re-scores"""
+    if created:
+        leaderboards.record(instance, added=instance)
+    elif sender is Rating:
+        leaderboards.record(instance)
+
+
+@receiver(post_delete, sender=Rating)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Comment)
+def activity_deleted(sender, instance, **kwargs):
+    leaderboards.record(instance, removed=instance)
+
+
+# ========= Search index =========
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, update_fields=None, **kwargs):
+    """Mirror the searchable columns into the full-text index"""
+    if update_fields is not None and not {'name', 'web'} & set(update_fields):
+        return
+    search_index.index_book(instance)
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    search_index.unindex_book(instance.pk)
+
+
+# ========= Navigation menu =========
+
+@receiver(post_save, sender=MainMenu)
+@receiver(post_delete, sender=MainMenu)
+def main_menu_changed(sender, **kwargs):
+    invalidate_menu()
+    page_cache.invalidate(page_cache.LAYOUT)
+
+
+# ========= Page cache =========
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def book_page_changed(sender, instance, **kwargs):
+    """A book's own pages, and any listing it could join, leave or reorder"""
+    page_cache.invalidate(page_cache.book_tag(instance.pk), page_cache.CATALOG)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def book_activity_page_changed(sender, instance, **kwargs):
+    page_cache.invalidate(page_cache.book_tag(instance.book_id))
+
+
+# ========= Stored files =========
+
+@receiver(post_delete, sender=Book)
+def release_book_files(sender, instance, **kwargs):
+    """
+    Delete the book's picture and thumbnails once no remaining book refers
+    to them. Uploads are content-addressed and shared, so the Book rows
+    pointing at a name are its reference count.
+    """
+    files = [
+        ('picture', instance.picture.name if instance.picture else '',
+         instance.picture.storage if instance.picture else None),
+        ('thumbnail', instance.thumbnail, default_storage),
+        ('thumbnail_webp', instance.thumbnail_webp, default_storage),
+    ]
+    orphans = [
+        (storage, name) for field, name, storage in files
+        if name and not Book.objects.filter(**{field: name}).exists()
+    ]
+
+    def delete_orphans():
+        for storage, name in orphans:
+            storage.delete(name)
+
+    if orphans:
+        transaction.on_commit(delete_orphans)
+
+
+# ========= Shopping cart =========
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        cart.merge_session_cart(request, user)
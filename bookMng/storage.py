@@ -0,0 +1,100 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Store each distinct upload once, named by its SHA-256 digest:
+    ``books/tough.jpg`` is saved as ``books/3f/3f5a...c1.jpg``.
+
+    The name isn't known until the whole upload has been read, so an
+    in-memory upload is first written to a ".upload-*" temporary file under
+    the storage location while it is hashed, then moved into place; it is
+    only read once. A duplicate is staged the same way, and its temporary
+    file is deleted once its digest turns out to exist already. Uploads
+    that are already on disk are hashed in place and moved.
+
+    Names never change meaning, which makes their URLs safe to cache
+    forever. Files are shared between books, so deleting a Book only
+    removes the blob once no other book references it (see
+    bookMng.signals.release_book_files).
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Digest names are final; an existing file is the same content
+        return name
+
+    def content_name(self, name, hexdigest):
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, hexdigest[:2], hexdigest + ext).replace("\\", "/")
+
+    def _save(self, name, content):
+        if hasattr(content, "seek"):
+            content.seek(0)
+        digest = hashlib.sha256()
+        if hasattr(content, "temporary_file_path"):
+            # Already on disk (a large upload): hash it and move it
+            for chunk in content.chunks(CHUNK_SIZE):
+                digest.update(chunk)
+            return self._store(self.content_name(name, digest.hexdigest()),
+                               content.temporary_file_path())
+        os.makedirs(self.location, exist_ok=True)
+        fd, staged = tempfile.mkstemp(dir=self.location, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    out.write(chunk)
+            return self._store(self.content_name(name, digest.hexdigest()), staged)
+        finally:
+            if os.path.exists(staged):
+                os.remove(staged)
+
+    def _store(self, name, staged):
+        """Move the file at ``staged`` to ``name`` unless that blob exists"""
+        if self.exists(name):
+            return name
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            file_move_safe(staged, full_path, CHUNK_SIZE, allow_overwrite=False)
+        except FileExistsError:
+            # A concurrent save of the same content got there first
+            return name
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+def is_content_addressed(name):
+    """True for names produced by ContentAddressedStorage"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return len(stem) == 64 and all(c in "0123456789abcdef" for c in stem)
+
+
+_picture_storage = None
+
+
+def picture_storage():
+    """Storage for Book.picture (a callable keeps it out of migrations)"""
+    global _picture_storage
+    if _picture_storage is None:
+        _picture_storage = ContentAddressedStorage()
+    return _picture_storage
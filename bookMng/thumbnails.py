@@ -0,0 +1,102 @@
+"""
+Background thumbnail generation for uploaded book pictures.
+
+postbook schedules a job once the upload is committed; a small in-process
+thread pool resizes the original to a JPEG thumbnail plus a WebP variant and
+records both paths on the Book. Listings serve those instead of the original.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from . import page_cache
+from .models import Book
+from .storage import is_content_addressed
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = "books/thumbs"
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "BOOKMNG_THUMBNAIL_WORKERS", 2),
+            thread_name_prefix="bookMng-thumbnails",
+        )
+    return _executor
+
+
+def render_variants(fp, size):
+    """Return (jpeg bytes, webp bytes) of the image in ``fp`` fitted to ``size``"""
+    with Image.open(fp) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        jpeg, webp = BytesIO(), BytesIO()
+        image.save(jpeg, "JPEG", quality=82, optimize=True, progressive=True)
+        image.save(webp, "WEBP", quality=80, method=4)
+    return jpeg.getvalue(), webp.getvalue()
+
+
+def generate_thumbnails(book_id, force=False):
+    """
+    Build and record the thumbnail/WebP pair for one book. Pictures stored
+    by digest share their thumbnails, so an identical upload reuses the
+    existing pair unless ``force`` is set.
+    """
+    book = Book.objects.filter(pk=book_id).only("id", "picture").first()
+    if book is None or not book.picture:
+        return
+    stem = os.path.splitext(os.path.basename(book.picture.name))[0]
+    names = (f"{THUMBNAIL_DIR}/{stem}.jpg", f"{THUMBNAIL_DIR}/{stem}.webp")
+    shared = is_content_addressed(book.picture.name)
+
+    if shared and force:
+        for name in names:
+            default_storage.delete(name)
+    if shared and all(default_storage.exists(name) for name in names):
+        thumbnail, thumbnail_webp = names
+    else:
+        size = tuple(getattr(settings, "BOOKMNG_THUMBNAIL_SIZE", (400, 400)))
+        with book.picture.open("rb") as fp:
+            jpeg, webp = render_variants(fp, size)
+        thumbnail = default_storage.save(names[0], ContentFile(jpeg))
+        thumbnail_webp = default_storage.save(names[1], ContentFile(webp))
+    Book.bump_version(book_id, thumbnail=thumbnail, thumbnail_webp=thumbnail_webp)
+    page_cache.invalidate_books([book_id])
+
+
+def _run(book_id):
+    try:
+        generate_thumbnails(book_id)
+    except Exception:
+        logger.exception("Thumbnail generation failed for book %s", book_id)
+    finally:
+        # Worker threads hold their own DB connections
+        connection.close()
+
+
+def schedule(book_id):
+    """
+    Queue thumbnail generation after the current transaction commits. With
+    BOOKMNG_THUMBNAIL_WORKERS = 0 the job runs inline instead.
+    """
+    def submit():
+        if getattr(settings, "BOOKMNG_THUMBNAIL_WORKERS", 2) == 0:
+            generate_thumbnails(book_id)
+        else:
+            _get_executor().submit(_run, book_id)
+
+    transaction.on_commit(submit)
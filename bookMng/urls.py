@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.index, name="index"),
@@ -24,6 +24,7 @@ urlpatterns = [
     # Comments (NEW)
     path("comment/add/<int:book_id>", views.add_comment, name="add_comment"),
     path("comment/delete/<int:comment_id>", views.delete_comment, name="delete_comment"),
+    path("comment/list/<int:book_id>", views.comment_page, name="comment_page"),
 
     # Ratings (NEW)
     path("rate/<int:book_id>", views.rate_book, name="rate_book"),
@@ -31,4 +32,18 @@ urlpatterns = [
     # Favorites (NEW)
     path("favorite/toggle/<int:book_id>", views.favorite_toggle, name="favorite_toggle"),
     path("favorites", views.favorites_list, name="favorites_list"),
+
+    # JSON API
+    path("api/books", api.book_list, name="api_book_list"),
+    path("api/books/search", api.book_search, name="api_book_search"),
+    path("api/books/<int:book_id>", api.book_detail, name="api_book_detail"),
+    path("api/books/<int:book_id>/comments", api.book_comments, name="api_book_comments"),
+    path("api/books/<int:book_id>/rating", api.book_rating, name="api_book_rating"),
+    path("api/books/<int:book_id>/favorite", api.book_favorite, name="api_book_favorite"),
+    path("api/batch/ratings", api.batch_ratings, name="api_batch_ratings"),
+    path("api/batch/favorites", api.batch_favorites, name="api_batch_favorites"),
+    path("api/batch/cart", api.batch_cart, name="api_batch_cart"),
+
+    # Instrumentation (staff only)
+    path("stats/requests", views.request_stats, name="request_stats"),
 ]
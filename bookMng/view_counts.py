@@ -0,0 +1,180 @@
+"""
+Buffered per-book view counters.
+
+A write per page view would serialize every book_detail hit on SQLite's
+single writer. Instead each worker process counts views in memory and
+writes them out in batches. A flush groups the pending books by count and
+runs one ``UPDATE ... SET views = views + n WHERE id IN (...)`` per
+distinct n. It runs when BOOKMNG_VIEW_FLUSH_THRESHOLD views are pending,
+at the latest BOOKMNG_VIEW_FLUSH_INTERVAL seconds after the previous one
+(a per-process timer thread sees to that when traffic stops), and again
+at interpreter exit. Counts are therefore approximate for a short time,
+and a hard kill loses at most one buffer's worth.
+
+Pages show the count as it was when they were rendered. Anonymous visitors
+get book_detail and the listings from the page cache, and a flush doesn't
+evict those pages, so there the count can lag by up to
+BOOKMNG_PAGE_CACHE_TIMEOUT on top of the flush interval.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """Thread-safe in-memory tally of book views awaiting a flush"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.total = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, book_id, n=1):
+        """Count ``n`` views; returns True when a flush is due"""
+        interval = getattr(settings, "BOOKMNG_VIEW_FLUSH_INTERVAL", 30)
+        threshold = getattr(settings, "BOOKMNG_VIEW_FLUSH_THRESHOLD", 500)
+        with self.lock:
+            self.pending[book_id] += n
+            self.total += n
+            return (self.total >= threshold
+                    or time.monotonic() - self.last_flush >= interval)
+
+    def take(self):
+        """Remove and return everything pending"""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.total = 0
+            self.last_flush = time.monotonic()
+        return pending
+
+    def restore(self, pending):
+        """Put back counts whose write failed, for the next flush"""
+        with self.lock:
+            self.pending.update(pending)
+            self.total += sum(pending.values())
+
+
+_buffer = ViewBuffer()
+
+
+def write(pending):
+    """Apply {book_id: n} with one UPDATE per distinct n"""
+    by_count = defaultdict(list)
+    for book_id, n in pending.items():
+        by_count[n].append(book_id)
+    for n, book_ids in by_count.items():
+        Book.objects.filter(id__in=book_ids).update(views=F("views") + n)
+
+
+def flush():
+    """Write out the buffered views; returns how many were written"""
+    pending = _buffer.take()
+    if not pending:
+        return 0
+    try:
+        write(pending)
+    except Exception:
+        _buffer.restore(pending)
+        logger.exception("Could not flush %d book view(s)", sum(pending.values()))
+        return 0
+    return sum(pending.values())
+
+
+def flush_if_due():
+    """
+    Flush if BOOKMNG_VIEW_FLUSH_INTERVAL seconds have passed since the last
+    flush; returns the seconds until the next one is due.
+    """
+    interval = getattr(settings, "BOOKMNG_VIEW_FLUSH_INTERVAL", 30)
+    wait = _buffer.last_flush + interval - time.monotonic()
+    if wait > 0:
+        return wait
+    flush()
+    return interval
+
+
+def _flush_periodically():
+    while True:
+        try:
+            wait = flush_if_due()
+        except Exception:
+            logger.exception("Periodic view flush failed")
+            wait = getattr(settings, "BOOKMNG_VIEW_FLUSH_INTERVAL", 30)
+        finally:
+            # The timer thread holds its own DB connection
+            connection.close()
+        time.sleep(wait)
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _start_flusher():
+    """Start this process's flush timer; lazily, so forked workers get one each"""
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid != os.getpid():
+            threading.Thread(
+                target=_flush_periodically, name="bookMng-view-flush", daemon=True
+            ).start()
+            _flusher_pid = os.getpid()
+
+
+def record(book_id):
+    _start_flusher()
+    if _buffer.add(book_id):
+        flush()
+
+
+async def arecord(book_id):
+    """record() for async views; only a due flush leaves the event loop"""
+    _start_flusher()
+    if _buffer.add(book_id):
+        await sync_to_async(flush)()
+
+
+def count_views(view):
+    """Record a view of ``book_id`` for each successful response"""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, book_id, *args, **kwargs):
+            response = await view(request, book_id, *args, **kwargs)
+            if response.status_code == 200:
+                await arecord(book_id)
+            return response
+    else:
+        @wraps(view)
+        def wrapper(request, book_id, *args, **kwargs):
+            response = view(request, book_id, *args, **kwargs)
+            if response.status_code == 200:
+                record(book_id)
+            return response
+    return wrapper
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    finally:
+        connection.close()
+
+
+atexit.register(_flush_at_exit)
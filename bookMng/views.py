@@ -1,24 +1,32 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.urls import reverse_lazy
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 
 from django.views.generic.edit import CreateView
 from django.contrib.auth.forms import UserCreationForm
-from django.db.models import Q, Avg
 
-from .models import MainMenu, Book, Comment, Rating, Favorite
+from . import (
+    cart, instrumentation, leaderboards, page_cache, recommendations, thumbnails,
+    view_counts,
+)
+from .api import COMMENT_ORDER
+from .models import Book, Comment, Rating, Favorite
 from .forms import BookForm
+from .pagination import get_page_size, keyset_paginate
+from .search_index import search_books
 
 
 # ========= Core pages =========
 
 def index(request):
-    return render(
-        request, "bookMng/index.html",
-        {"item_list": MainMenu.objects.all()}
-    )
+    return render(request, "bookMng/index.html", {
+        "trending": leaderboards.trending(),
+        "top_rated": leaderboards.top_rated(),
+    })
 
 
 def postbook(request):
@@ -35,72 +43,106 @@ def postbook(request):
                     book.save(update_fields=["pic_path"])
                 except Exception:
                     pass
+                thumbnails.schedule(book.id)
             return HttpResponseRedirect("/displaybooks")
     else:
         form = BookForm()
 
     return render(
         request, "bookMng/postbook.html",
-        {"item_list": MainMenu.objects.all(), "form": form}
+        {"form": form}
     )
 
 
+@page_cache.cache_anonymous_page
 def displaybooks(request):
-    books = Book.objects.all().order_by("name")
-    # Add average rating to each book
-    for book in books:
-        book.avg_rating = book.average_rating()
+    books = keyset_paginate(
+        Book.objects.with_listing_data(),
+        request.GET.get("cursor"),
+        get_page_size(request),
+    )
+    page_cache.add_tags(
+        request, page_cache.CATALOG, *(page_cache.book_tag(b.id) for b in books)
+    )
     return render(
         request, "bookMng/displaybooks.html",
-        {"item_list": MainMenu.objects.all(), "books": books}
+        {
+            "books": books,
+            "page_size_param": request.GET.get("page_size", ""),
+        }
     )
 
 
 def mybooks(request):
     if request.user.is_authenticated:
-        books = Book.objects.filter(username=request.user).order_by("name")
+        books = (
+            Book.objects.with_listing_data()
+            .filter(username=request.user)
+            .order_by("name")
+        )
     else:
         books = Book.objects.none()
 
     return render(
         request, "bookMng/mybooks.html",
-        {"item_list": MainMenu.objects.all(), "books": books}
+        {"books": books}
     )
 
 
+# Outside the page cache, so cached hits still count
+@view_counts.count_views
+@page_cache.cache_anonymous_page
 def book_detail(request, book_id):
-    book = get_object_or_404(Book, id=book_id)
-    comments = book.comments.all()
+    book = get_object_or_404(Book.objects.select_related("username"), id=book_id)
+    # The rating average and comment total come from counters on the book
+    comments = _comment_page(book_id, None)
+    similar = list(recommendations.neighbors_of(book_id))
     user_rating = None
     is_favorited = False
-    
+
     if request.user.is_authenticated:
-        try:
-            user_rating = Rating.objects.get(book=book, user=request.user)
-        except Rating.DoesNotExist:
-            pass
-        is_favorited = Favorite.objects.filter(user=request.user, book=book).exists()
-    
+        user_rating = Rating.objects.filter(book_id=book_id, user=request.user).first()
+        is_favorited = Favorite.objects.filter(book_id=book_id, user=request.user).exists()
+
+    page_cache.add_tags(
+        request, page_cache.book_tag(book_id), page_cache.RECOMMENDATIONS,
+        *(page_cache.book_tag(row.neighbor_id) for row in similar),
+    )
+
     return render(
         request, "bookMng/book_detail.html",
         {
-            "item_list": MainMenu.objects.all(),
             "book": book,
             "comments": comments,
+            "similar": similar,
             "user_rating": user_rating,
             "is_favorited": is_favorited,
-            "avg_rating": book.average_rating()
         }
     )
 
 
+def _comment_page(book_id, cursor):
+    return keyset_paginate(
+        Comment.objects.filter(book_id=book_id).select_related("user"),
+        cursor,
+        getattr(settings, "BOOKMNG_COMMENTS_PAGE_SIZE", 20),
+        fields=COMMENT_ORDER,
+    )
+
+
+def comment_page(request, book_id):
+    """The next page of a book's comments, as HTML for book_detail to append"""
+    comments = _comment_page(book_id, request.GET.get("cursor"))
+    return render(
+        request, "bookMng/_comments.html",
+        {"comments": comments, "book_id": book_id}
+    )
+
+
 def book_delete(request, book_id):
     book = get_object_or_404(Book, id=book_id)
     book.delete()
-    return render(
-        request, "bookMng/book_delete.html",
-        {"item_list": MainMenu.objects.all()}
-    )
+    return render(request, "bookMng/book_delete.html")
 
 
 # ========= Registration =========
@@ -112,7 +154,6 @@ class Register(CreateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["item_list"] = MainMenu.objects.all()
         ctx["next"] = self.request.GET.get("next", "")
         return ctx
 
@@ -123,60 +164,42 @@ class Register(CreateView):
 
 # ========= About =========
 
+@page_cache.cache_anonymous_page
 def aboutus(request):
-    return render(
-        request, "bookMng/aboutus.html",
-        {"item_list": MainMenu.objects.all()}
-    )
+    return render(request, "bookMng/aboutus.html")
 
 
 # ========= Search =========
 
+@page_cache.cache_anonymous_page
 def search(request):
     q = request.GET.get("q", "").strip()
-    results = Book.objects.none()
+    results = []
     if q:
-        results = Book.objects.filter(
-            Q(name__icontains=q) | Q(web__icontains=q)
-        ).order_by("name")
-        # Add average rating
-        for book in results:
-            book.avg_rating = book.average_rating()
+        results = search_books(
+            q, request.GET.get("cursor"), get_page_size(request)
+        )
+    page_cache.add_tags(
+        request, page_cache.CATALOG, *(page_cache.book_tag(b.id) for b in results)
+    )
 
     return render(
         request, "bookMng/search.html",
-        {"item_list": MainMenu.objects.all(), "q": q, "results": results}
+        {
+            "q": q,
+            "results": results,
+            "page_size_param": request.GET.get("page_size", ""),
+        }
     )
 
 
-# ========= Shopping Cart (session-based) =========
-
-def _get_cart(request):
-    """
-    Cart structure stored in session as dict: { "book_id": quantity, ... }
-    """
-    cart = request.session.get("cart", {})
-    request.session["cart"] = cart  # ensure it exists
-    return cart
-
+# ========= Shopping Cart =========
 
 def cart_view(request):
-    cart = _get_cart(request)
-    ids = [int(k) for k in cart.keys()]
-    items = Book.objects.filter(id__in=ids)
-
-    rows = []
-    total = 0.0
-    for b in items:
-        qty = int(cart.get(str(b.id), 0))
-        line = float(b.price) * qty if b.price is not None else 0.0
-        total += line
-        rows.append({"book": b, "qty": qty, "line": line})
-
+    rows, total = cart.cart_contents(request)
     return render(
         request, "bookMng/cart.html",
         {
-            "item_list": MainMenu.objects.all(),
             "rows": rows,
             "total": total,
         }
@@ -184,22 +207,17 @@ def cart_view(request):
 
 
 def cart_add(request, book_id):
-    cart = _get_cart(request)
-    cart[str(book_id)] = int(cart.get(str(book_id), 0)) + 1
-    request.session.modified = True
+    cart.add(request, book_id)
     return HttpResponseRedirect(request.META.get("HTTP_REFERER", "/cart"))
 
 
 def cart_remove(request, book_id):
-    cart = _get_cart(request)
-    cart.pop(str(book_id), None)
-    request.session.modified = True
+    cart.remove(request, book_id)
     return HttpResponseRedirect("/cart")
 
 
 def cart_clear(request):
-    request.session["cart"] = {}
-    request.session.modified = True
+    cart.clear(request)
     return HttpResponseRedirect("/cart")
 
 
@@ -271,17 +289,21 @@ def favorite_toggle(request, book_id):
 @login_required
 def favorites_list(request):
     """Show user's favorite books"""
-    favorites = Favorite.objects.filter(user=request.user).select_related('book')
-    books = [fav.book for fav in favorites]
-    
-    # Add average rating to each book
-    for book in books:
-        book.avg_rating = book.average_rating()
-    
+    books = (
+        Book.objects.with_listing_data()
+        .filter(favorite__user=request.user)
+        .order_by('-favorite__added_at')
+    )
+    recommended = recommendations.for_user(request.user) if books else []
     return render(
         request, "bookMng/favorites.html",
-        {
-            "item_list": MainMenu.objects.all(),
-            "books": books
-        }
+        {"books": books, "recommended": recommended}
     )
+
+
+# ========= Instrumentation =========
+
+@staff_member_required
+def request_stats(request):
+    """Per-URL-name latency histograms for this worker process"""
+    return JsonResponse(instrumentation.snapshot())